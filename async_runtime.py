@@ -0,0 +1,231 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from latency import monitor
+from market_data import BaseMarketData, fetch_missed_klines
+
+
+# Market data, context refreshes and strategy evaluation on a single asyncio loop.
+#
+# It shares the BaseMarketData subscriber registry and the start/stop interface with
+# MarketDataClient, so TradingEngine, CandlestickChart and TickRecorder work with it
+# unchanged, but every subscriber callback runs on the loop thread. That thread is
+# therefore the only writer of strategy state. The feed coroutine decodes messages
+# into a bounded queue and stops reading the socket while the queue is full, so a
+# slow consumer pushes back on the connection instead of growing memory. Blocking HTTP calls
+# (Fear & Greed, Reddit, REST backfill) run on a small executor and never stall the loop.
+class AsyncMarketData(BaseMarketData):
+    def __init__(self, queue_size=10000, executor_workers=2, **kwargs):
+        super().__init__(**kwargs)
+        self.queue_size = queue_size
+        self.executor_workers = executor_workers
+        self.received = 0
+
+        self._refreshers = {}  # refresher -> asyncio task, once scheduled on the loop
+        self._thread = None
+        self._loop = None
+        self._stopped = None
+        self._stop_requested = False
+        self._ws = None
+        self._executor = None
+
+    def _request_streams(self, method, streams):
+        self._call_on_loop(self._send_method, method, streams)
+
+    # Run refresher() on the executor whenever it is due; it returns the seconds until its next run
+    def add_refresher(self, refresher):
+        with self._lock:
+            if refresher in self._refreshers:
+                return
+            self._refreshers[refresher] = None
+        self._call_on_loop(self._schedule_refresher, refresher)
+
+    def remove_refresher(self, refresher):
+        with self._lock:
+            task = self._refreshers.pop(refresher, None)
+        if task is not None:
+            self._call_on_loop(task.cancel)
+
+    # Run the loop on a background thread, e.g. next to the Tk mainloop
+    def start(self):
+        if self.running:
+            return
+        if self._thread is not None:
+            self._thread.join()  # let the previous loop finish shutting down
+        self.running = True
+        self._stop_requested = False
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._stop_requested = True
+        # Before run() has created the event, _stop_requested stops the loop as it comes up
+        stopped = self._stopped
+        if stopped is not None:
+            self._call_on_loop(stopped.set)
+
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    # Run on the current event loop until stop() is called
+    async def run(self):
+        self.running = True
+        self._stopped = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if self._stop_requested:
+            self._stopped.set()  # stop() was called before the loop came up
+        self._executor = ThreadPoolExecutor(max_workers=self.executor_workers, thread_name_prefix='context')
+        messages = asyncio.Queue(maxsize=self.queue_size)
+
+        with self._lock:
+            refreshers = list(self._refreshers)
+        for refresher in refreshers:
+            self._schedule_refresher(refresher)
+
+        tasks = [asyncio.create_task(self._feed(messages)), asyncio.create_task(self._consume(messages)),
+                 asyncio.create_task(self._watch_heartbeat())]
+        try:
+            await self._stopped.wait()
+        finally:
+            self.running = False
+            if self._ws is not None:
+                await self._ws.close()
+            with self._lock:
+                tasks.extend(task for task in self._refreshers.values() if task is not None)
+                self._refreshers = dict.fromkeys(self._refreshers)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._loop = None
+            self._stop_requested = False
+
+    def _call_on_loop(self, callback, *args):
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(callback, *args)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def _schedule_refresher(self, refresher):
+        with self._lock:
+            if refresher in self._refreshers and self._refreshers[refresher] is None:
+                self._refreshers[refresher] = asyncio.create_task(self._refresh_forever(refresher))
+
+    async def _refresh_forever(self, refresher):
+        while True:
+            delay = await self._loop.run_in_executor(self._executor, refresher)
+            await asyncio.sleep(delay)
+
+    # Keep a connection open, reconnecting with exponential backoff, and queue every message
+    async def _feed(self, messages):
+        import websockets
+        backoff = self.min_backoff
+        has_connected = False
+        while self.running:
+            streams = self.streams()
+            if not streams:
+                await asyncio.sleep(0.5)
+                continue
+
+            connected_at = None
+            try:
+                async with websockets.connect(self._url(streams), ping_interval=self.ping_interval,
+                                              ping_timeout=self.ping_timeout, max_size=None) as ws:
+                    print("WebSocket connection opened")
+                    self._ws = ws
+                    self.connected = True
+                    connected_at = time.monotonic()
+                    self._last_message = connected_at
+
+                    # Streams subscribed while the connection was being made
+                    missing = self._missing_streams(streams)
+                    if missing:
+                        self._send_method("SUBSCRIBE", missing)
+
+                    # Backfill before any live message is queued so subscribers see klines in order
+                    if has_connected:
+                        await self._backfill(messages)
+                    has_connected = True
+
+                    async for message in ws:
+                        self._last_message = time.monotonic()
+                        self.received += 1
+                        await self._enqueue(messages, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"WebSocket Error: {e}")
+            finally:
+                self._ws = None
+                self.connected = False
+
+            if not self.running:
+                break
+            delay, backoff = self._reconnect_delay(backoff, connected_at)
+            await asyncio.sleep(delay)
+
+    async def _enqueue(self, messages, message):
+        try:
+            stream, data = self._decode(message)
+        except Exception as e:
+            print(f"Market data error: {e}")
+            return
+        if stream is None:
+            return  # reply to SUBSCRIBE / UNSUBSCRIBE
+        # Blocks the feed while the consumer is behind
+        await messages.put((stream, data))
+
+    # Replay the klines missed while disconnected through the queue
+    async def _backfill(self, messages):
+        for stream, last_open in self._backfill_starts():
+            try:
+                payloads = await self._loop.run_in_executor(self._executor, fetch_missed_klines,
+                                                            self.rest_url, stream, last_open)
+            except Exception as e:
+                print(f"Error backfilling {stream}: {e}")
+                continue
+            for data in payloads:
+                self._note_backfilled(stream, data)
+                await messages.put((stream, data))
+
+    # The single consumer: every subscriber callback, and so every strategy state change, runs here
+    async def _consume(self, messages):
+        while True:
+            stream, data = await messages.get()
+            self._dispatch(stream, data)
+            # Drain whatever else is already queued without yielding per message
+            while not messages.empty():
+                stream, data = messages.get_nowait()
+                self._dispatch(stream, data)
+            monitor.set_gauge('feed_backlog', messages.qsize())
+
+    # Force a reconnect when no data message has arrived for heartbeat_timeout seconds
+    async def _watch_heartbeat(self):
+        while True:
+            await asyncio.sleep(1)
+            ws = self._ws
+            if ws is not None and time.monotonic() - self._last_message > self.heartbeat_timeout:
+                print("Market data heartbeat timed out")
+                await ws.close()
+
+    def _send_method(self, method, streams):
+        ws = self._ws
+        if ws is None:
+            return  # picked up from streams() on the next connect
+        message = json.dumps({"method": method, "params": streams, "id": self._next_request_id()})
+        asyncio.ensure_future(self._send(ws, method, message))
+
+    async def _send(self, ws, method, message):
+        try:
+            await ws.send(message)
+        except Exception as e:
+            print(f"Error sending {method}: {e}")
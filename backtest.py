@@ -0,0 +1,223 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from strategy import StrategyParams
+
+
+TIME_COLUMNS = ('time', 'timestamp', 'open_time', 'T', 'E')
+PRICE_COLUMNS = ('close', 'price', 'c', 'p')
+
+
+# Read a CSV or Parquet file into a DataFrame
+def _read_table(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def _find_column(df, candidates, path):
+    for column in candidates:
+        if column in df.columns:
+            return column
+    raise ValueError(f"{path}: none of the columns {candidates} found")
+
+
+def _to_datetime(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.to_datetime(values, unit='ms')
+    return pd.to_datetime(values)
+
+
+# Load recorded trades or klines as a time-indexed DataFrame with a 'close' column
+def load_history(path):
+    df = _read_table(path)
+    time_column = _find_column(df, TIME_COLUMNS, path)
+    price_column = _find_column(df, PRICE_COLUMNS, path)
+
+    history = pd.DataFrame({
+        'close': df[price_column].astype(float).to_numpy()
+    }, index=_to_datetime(df[time_column]))
+    history.index.name = 'time'
+    return history.sort_index(kind='stable')
+
+
+# Load a recorded time series (Fear & Greed, sentiment) as a time-indexed Series
+def load_series(path, value_column='value'):
+    df = _read_table(path)
+    time_column = _find_column(df, TIME_COLUMNS, path)
+    series = pd.Series(df[value_column].astype(float).to_numpy(), index=_to_datetime(df[time_column]))
+    return series.sort_index(kind='stable')
+
+
+# Value of a recorded series as of each history timestamp (last known value, NaN before the first)
+def align_series(index, series):
+    if series is None:
+        return np.full(len(index), np.nan)
+    positions = series.index.searchsorted(index, side='right') - 1
+    values = series.to_numpy(dtype=float)[np.clip(positions, 0, None)]
+    values[positions < 0] = np.nan
+    return values
+
+
+# Rolling mean that is NaN until the window is full, computed from a cumulative sum
+def rolling_mean(values, window):
+    result = np.full(len(values), np.nan)
+    if len(values) < window:
+        return result
+    # Offset by the first value to keep the cumulative sum small and precise
+    offset = values[0]
+    cumsum = np.concatenate(([0.0], np.cumsum(values - offset)))
+    result[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window + offset
+    return result
+
+
+# Buy and sell scores for every bar, using the same rules as TradingLogic.apply_trading_logic
+def compute_scores(close, fear_greed, sentiment, params, sma_short=None, sma_long=None):
+    if sma_short is None:
+        sma_short = rolling_mean(close, params.short_window)
+    if sma_long is None:
+        sma_long = rolling_mean(close, params.long_window)
+    sma_diff = sma_short - sma_long
+    ready = ~np.isnan(sma_diff)
+
+    buy_score = np.where(sma_diff > 0, sma_diff, 0.0)
+    sell_score = np.where(sma_diff <= 0, np.abs(sma_diff), 0.0)
+
+    # Comparisons against NaN are False, so a missing index adds no points
+    buy_score += np.select([fear_greed <= params.extreme_fear, fear_greed <= params.fear], [5, 2], 0)
+    sell_score += np.select([fear_greed >= params.extreme_greed, fear_greed >= params.greed], [5, 2], 0)
+
+    sentiment = np.nan_to_num(sentiment, nan=0.0)
+    buy_score += np.select([sentiment > params.strong_sentiment, sentiment > params.moderate_sentiment], [3, 1], 0)
+    sell_score += np.select([sentiment < -params.strong_sentiment, sentiment < -params.moderate_sentiment], [3, 1], 0)
+
+    buy_score[~ready] = np.nan
+    sell_score[~ready] = np.nan
+    return sma_diff, buy_score, sell_score
+
+
+# All-in / all-out execution. Only the bars where a trade happens are visited, so the
+# cost scales with the number of trades rather than the number of bars.
+def simulate(close, buy_score, sell_score, params, initial_balance=10000):
+    commission_fee = params.commission_fee
+    buy_bars = np.flatnonzero(buy_score >= params.score_threshold)
+    sell_bars = np.flatnonzero(sell_score >= params.score_threshold)
+
+    trades = []
+    balance = float(initial_balance)
+    position = 0.0
+    bar = -1
+    while True:
+        next_buy = np.searchsorted(buy_bars, bar, side='right')
+        if next_buy >= len(buy_bars) or balance <= 0:
+            break
+        bar = buy_bars[next_buy]
+        position = balance * (1 - commission_fee) / close[bar]
+        balance = 0.0
+        trades.append((bar, 'Buy', close[bar], balance, position))
+
+        next_sell = np.searchsorted(sell_bars, bar, side='right')
+        if next_sell >= len(sell_bars):
+            break
+        bar = sell_bars[next_sell]
+        balance = position * close[bar] * (1 - commission_fee)
+        position = 0.0
+        trades.append((bar, 'Sell', close[bar], balance, position))
+
+    # Cash and position are constant between trades, forward-fill them from each trade bar
+    cash = np.full(len(close), float(initial_balance))
+    holdings = np.zeros(len(close))
+    if trades:
+        trade_bars = np.array([trade[0] for trade in trades])
+        last_trade = np.full(len(close), -1)
+        last_trade[trade_bars] = np.arange(len(trades))
+        last_trade = np.maximum.accumulate(last_trade)
+        traded = last_trade >= 0
+        cash[traded] = np.array([trade[3] for trade in trades])[last_trade[traded]]
+        holdings[traded] = np.array([trade[4] for trade in trades])[last_trade[traded]]
+    equity = cash + holdings * close
+    return trades, equity
+
+
+def summarize(equity, trades, initial_balance):
+    if len(equity) == 0:
+        return {'total_return': 0.0, 'max_drawdown': 0.0, 'trade_count': 0, 'final_equity': float(initial_balance)}
+    running_max = np.maximum.accumulate(equity)
+    drawdown = (equity - running_max) / running_max
+    return {
+        'total_return': float(equity[-1] / initial_balance - 1),
+        'max_drawdown': float(-drawdown.min()),
+        'trade_count': len(trades),
+        'final_equity': float(equity[-1])
+    }
+
+
+class BacktestResult:
+    def __init__(self, trades, equity, stats):
+        self.trades = trades
+        self.equity = equity
+        self.stats = stats
+
+
+# Replay a price history through the strategy and return the trade log, equity curve and stats
+def run_backtest(history, fear_greed=None, sentiment=None, params=None, initial_balance=10000):
+    params = params or StrategyParams()
+    close = history['close'].to_numpy(dtype=float)
+    fear_greed_values = align_series(history.index, fear_greed)
+    sentiment_values = align_series(history.index, sentiment)
+
+    _, buy_score, sell_score = compute_scores(close, fear_greed_values, sentiment_values, params)
+    trades, equity = simulate(close, buy_score, sell_score, params, initial_balance)
+
+    trade_log = pd.DataFrame(
+        [(history.index[bar], action, price, balance, position, buy_score[bar], sell_score[bar])
+         for bar, action, price, balance, position in trades],
+        columns=['time', 'action', 'price', 'balance', 'btc_position', 'buy_score', 'sell_score']
+    )
+    equity_curve = pd.Series(equity, index=history.index, name='equity')
+    return BacktestResult(trade_log, equity_curve, summarize(equity, trades, initial_balance))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the trading rules on recorded trades or klines")
+    parser.add_argument('history', help="CSV or Parquet file of trades or klines")
+    parser.add_argument('--fear-greed', help="CSV or Parquet file with time and value columns")
+    parser.add_argument('--sentiment', help="CSV or Parquet file with time and value columns")
+    parser.add_argument('--balance', type=float, default=10000)
+    parser.add_argument('--commission', type=float, default=StrategyParams.commission_fee)
+    parser.add_argument('--threshold', type=float, default=StrategyParams.score_threshold)
+    parser.add_argument('--short-window', type=int, default=StrategyParams.short_window)
+    parser.add_argument('--long-window', type=int, default=StrategyParams.long_window)
+    parser.add_argument('--trades-out', help="Write the trade log to this CSV file")
+    parser.add_argument('--equity-out', help="Write the equity curve to this CSV file")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    fear_greed = load_series(args.fear_greed) if args.fear_greed else None
+    sentiment = load_series(args.sentiment) if args.sentiment else None
+
+    params = StrategyParams(
+        short_window=args.short_window,
+        long_window=args.long_window,
+        score_threshold=args.threshold,
+        commission_fee=args.commission
+    )
+    result = run_backtest(history, fear_greed, sentiment, params, args.balance)
+
+    if args.trades_out:
+        result.trades.to_csv(args.trades_out, index=False)
+    if args.equity_out:
+        result.equity.to_csv(args.equity_out)
+
+    print(f"Trades: {result.stats['trade_count']}")
+    print(f"Total return: {result.stats['total_return'] * 100:.2f}%")
+    print(f"Max drawdown: {result.stats['max_drawdown'] * 100:.2f}%")
+    print(f"Final equity: ${result.stats['final_equity']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
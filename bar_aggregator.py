@@ -0,0 +1,98 @@
+BAR_KINDS = ('time', 'volume', 'dollar')
+TIME_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+# One OHLCV bar. Times are exchange milliseconds.
+class Bar:
+    __slots__ = ('open_time', 'close_time', 'open', 'high', 'low', 'close', 'volume', 'dollar_volume', 'trades',
+                 'closed')
+
+    def __init__(self, open_time, close_time, price):
+        self.open_time = open_time
+        self.close_time = close_time
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0.0
+        self.dollar_volume = 0.0
+        self.trades = 0
+        self.closed = False
+
+    def add(self, price, qty):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += qty
+        self.dollar_volume += price * qty
+        self.trades += 1
+
+    # Same fields as the 'k' object of a Binance kline message, so kline consumers can take bars
+    def to_kline(self):
+        return {
+            't': self.open_time, 'T': self.close_time,
+            'o': self.open, 'h': self.high, 'l': self.low, 'c': self.close, 'v': self.volume,
+            'q': self.dollar_volume, 'n': self.trades, 'x': self.closed
+        }
+
+
+# Builds bars from a trade stream.
+#   time:   size is the bar length in seconds; a bar closes when the first trade of a
+#           later interval arrives, and intervals without trades produce no bar
+#   volume: a bar closes once it holds at least `size` of the base asset
+#   dollar: a bar closes once it holds at least `size` of quote volume
+# The trade that reaches a volume or dollar threshold belongs to the bar it closes.
+class BarAggregator:
+    def __init__(self, kind='time', size=60):
+        if kind not in BAR_KINDS:
+            raise ValueError(f"Unknown bar kind: {kind}")
+        if size <= 0:
+            raise ValueError("Bar size must be positive")
+        self.kind = kind
+        self.size = size
+        self.size_ms = int(size * 1000)
+        self.current = None
+        self.bars_closed = 0
+
+    def __repr__(self):
+        return f"BarAggregator({self.kind!r}, {self.size!r})"
+
+    # Add a trade and return the bar it closed, if any
+    def update(self, price, qty, time_ms):
+        bar = self.current
+        if self.kind == 'time':
+            if bar is not None and time_ms <= bar.close_time:
+                bar.add(price, qty)
+                return None
+            open_time = time_ms - time_ms % self.size_ms
+            self.current = Bar(open_time, open_time + self.size_ms - 1, price)
+            self.current.add(price, qty)
+            return self._close(bar)
+
+        if bar is None:
+            bar = self.current = Bar(time_ms, time_ms, price)
+        bar.add(price, qty)
+        bar.close_time = time_ms
+        if (bar.volume if self.kind == 'volume' else bar.dollar_volume) >= self.size:
+            self.current = None
+            return self._close(bar)
+        return None
+
+    def _close(self, bar):
+        if bar is not None:
+            bar.closed = True
+            self.bars_closed += 1
+        return bar
+
+
+# Parse a bar spec: '1s', '1m', '5m', '1h' for time bars, 'volume:<qty>' or
+# 'dollar:<quote amount>' for activity bars. 'tick' (or empty) means no bars.
+def parse_bar_spec(spec):
+    if not spec or spec == 'tick':
+        return None
+    kind, _, size = spec.partition(':')
+    if kind in ('volume', 'dollar'):
+        return BarAggregator(kind, float(size))
+    unit = spec[-1]
+    if unit not in TIME_UNITS or not spec[:-1].isdigit():
+        raise ValueError(f"Invalid bar spec: {spec}")
+    return BarAggregator('time', int(spec[:-1]) * TIME_UNITS[unit])
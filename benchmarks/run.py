@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+CHART_CASES = [(50, 0), (100, 0), (100, 100), (100, 1000), (500, 100)]  # (candles, markers)
+
+
+# Reddit and HTTP stand-ins: fixed posts, a constant analyzer and a Fear & Greed reading set in memory
+class StubSentimentSource:
+    def fetch_posts(self):
+        return [(str(i), "Bitcoin is going up") for i in range(100)]
+
+
+class StubAnalyzer:
+    def polarity_scores(self, text):
+        return {'compound': 0.3}
+
+
+def make_logic():
+    from market_context import FearGreedProvider
+    from sentiment import SentimentEngine
+    from trading_logic import TradingLogic
+
+    provider = FearGreedProvider(cache_path=None)
+    provider._reading = (25, "Fear", int(time.time()), time.time(), None)
+    logic = TradingLogic(enable_sentiment=False, fear_greed_provider=provider)
+    logic.sentiment_engine = SentimentEngine(StubSentimentSource(), analyzer=StubAnalyzer())
+    logic.sentiment_engine.refresh()
+    return logic
+
+
+# Random-walk trades, or the trades of a recording made with TickRecorder
+def load_trades(count, recording=None, seed=0):
+    if recording:
+        from tick_store import load_stream, recorded_streams
+        stream = next(name for name in recorded_streams(recording) if name.endswith('@trade'))
+        columns = load_stream(recording, stream)
+        return (np.asarray(columns['price'][:count], dtype=float), np.asarray(columns['qty'][:count], dtype=float),
+                np.asarray(columns['trade_time'][:count], dtype=np.int64))
+    rng = np.random.default_rng(seed)
+    prices = 30000 * np.exp(np.cumsum(rng.normal(0, 0.0005, count)))
+    quantities = rng.exponential(0.05, count)
+    times = 1_700_000_000_000 + np.cumsum(rng.integers(1, 50, count))
+    return prices, quantities, times
+
+
+def trade_messages(prices, quantities, times):
+    return [json.dumps({'stream': 'btcusdt@trade', 'data': {
+        'e': 'trade', 'E': int(t) + 5, 's': 'BTCUSDT', 't': i, 'p': f"{p:.2f}", 'q': f"{q:.5f}", 'T': int(t),
+        'm': bool(i % 2)
+    }}) for i, (p, q, t) in enumerate(zip(prices, quantities, times))]
+
+
+def _timed(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_strategy(prices, repeat):
+    prices = prices.tolist()
+
+    def run():
+        logic = make_logic()
+        for price in prices:
+            logic.update_price_data(price)
+            logic.apply_trading_logic()
+
+    seconds = _timed(run, repeat)
+    return {'strategy_ticks_per_s': (len(prices) / seconds, 'ticks/s', True)}
+
+
+def bench_decode(messages, repeat):
+    def decode_only():
+        for message in messages:
+            json.loads(message)
+
+    def decode_and_extract():
+        for message in messages:
+            data = json.loads(message)['data']
+            float(data['p']), float(data['q']), data['T'], data['E']
+
+    # The decoder layer: the fastest installed JSON backend and a __slots__ record per trade
+    def decoder_records():
+        for message in messages:
+            _, data = decode_message(message)
+            decode_trade(data)
+
+    # Replay path: whole batches straight into NumPy columns
+    def decoder_batches():
+        for start in range(0, len(messages), 10_000):
+            decode_trade_batch(messages[start:start + 10_000])
+
+    from decoders import BACKEND, decode_message, decode_trade, decode_trade_batch
+    stdlib = _timed(decode_and_extract, repeat) / len(messages) * 1e9
+    records = _timed(decoder_records, repeat) / len(messages) * 1e9
+    print(f"Decoder backend: {BACKEND}")
+    return {
+        'json_loads_ns_per_msg': (_timed(decode_only, repeat) / len(messages) * 1e9, 'ns/msg', False),
+        'decode_extract_ns_per_msg': (stdlib, 'ns/msg', False),
+        'decoder_record_ns_per_msg': (records, 'ns/msg', False),
+        'decoder_batch_ns_per_msg': (_timed(decoder_batches, repeat) / len(messages) * 1e9, 'ns/msg', False),
+        'decoder_speedup': (stdlib / records, 'x', True)
+    }
+
+
+# Needs a display; reported as skipped otherwise
+def bench_update_gui(prices, repeat):
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipping update_gui: {e}")
+        return {}
+    root.withdraw()
+
+    from main import CryptoTradingBotGUI
+
+    class IdleMarketData:
+        def subscribe(self, stream, callback):
+            return callback
+
+        def unsubscribe(self, stream, callback):
+            pass
+
+    app = CryptoTradingBotGUI(root, market_data=IdleMarketData())
+    app.logic = make_logic()
+    state = app.logic.get_state()
+    prices = prices[:1000].tolist()
+
+    def run():
+        for price in prices:
+            app.update_gui(price, 1.5, 2, 1, 3.5, 0, state)
+            root.update_idletasks()
+
+    seconds = _timed(run, repeat)
+    app.render_pipeline.stop()
+    root.destroy()
+    return {'update_gui_us': (seconds / len(prices) * 1e6, 'us/call', False)}
+
+
+# Render time of one chart frame, drawn with the Agg backend so no display is needed
+def bench_chart(repeat):
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    import matplotlib.pyplot as plt
+    from datetime import datetime, timedelta, timezone
+    from candlestick_chart import CandlestickChart
+
+    class NoTimerRoot:
+        def after(self, delay, callback):
+            return None
+
+    results = {}
+    start_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for candles, markers in CHART_CASES:
+        chart = CandlestickChart(NoTimerRoot(), max_candles=candles)
+        chart.canvas = FigureCanvasAgg(chart.fig)
+        for i in range(candles):
+            price = 30000 + 50 * np.sin(i / 10)
+            chart.apply_candle({'time': start_time + timedelta(minutes=i), 'open': price, 'high': price + 20,
+                                'low': price - 20, 'close': price + 5, 'volume': 1.0})
+        for i in range(markers):
+            chart.mark_trade_action(30000, "Buy" if i % 2 else "Sell",
+                                    start_time + timedelta(minutes=candles * i / markers))
+
+        # One live update to the last candle per frame, as during trading
+        def frame():
+            last = dict(chart.price_data[-1])
+            last['close'] += 1
+            chart.pending_klines.append(last)
+            chart.markers_dirty = True
+            chart.update_candlestick_chart()  # draw_idle renders synchronously on Agg
+
+        frames = 20
+        seconds = _timed(lambda: [frame() for _ in range(frames)], repeat)
+        results[f"chart_frame_ms_{candles}c_{markers}m"] = (seconds / frames * 1000, 'ms/frame', False)
+        plt.close(chart.fig)
+    return results
+
+
+GROUPS = ('strategy', 'decode', 'gui', 'chart')
+
+
+def run(ticks=100_000, messages=100_000, repeat=3, recording=None, skip_gui=False, groups=GROUPS):
+    prices, quantities, times = load_trades(max(ticks, messages), recording)
+    results = {}
+    if 'strategy' in groups:
+        results.update(bench_strategy(prices[:ticks], repeat))
+    if 'decode' in groups:
+        results.update(bench_decode(trade_messages(prices[:messages], quantities[:messages], times[:messages]),
+                                    repeat))
+    if 'gui' in groups and not skip_gui:
+        results.update(bench_update_gui(prices, repeat))
+    if 'chart' in groups:
+        results.update(bench_chart(repeat))
+    return {name: {'value': value, 'unit': unit, 'higher_is_better': higher} for name, (value, unit, higher) in
+            results.items()}
+
+
+# Whether a baseline was measured on this kind of host; timings from another Python
+# version, CPU architecture or JSON backend are only shown, not treated as regressions
+def same_host(report, baseline):
+    return all(report[key] == baseline.get(key) for key in ('python', 'machine', 'decoder_backend'))
+
+
+# Relative change per benchmark, positive when it got better
+def compare(results, baseline):
+    changes = {}
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base['value']:
+            continue
+        change = (result['value'] - base['value']) / base['value']
+        changes[name] = change if result['higher_is_better'] else -change
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the strategy, feed decoding and rendering hot paths")
+    parser.add_argument('--ticks', type=int, default=100_000, help="Ticks through the strategy")
+    parser.add_argument('--messages', type=int, default=100_000, help="Messages decoded")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark (the best is kept)")
+    parser.add_argument('--recording', help="TickRecorder directory to take trades from instead of synthetic data")
+    parser.add_argument('--skip-gui', action='store_true', help="Don't benchmark update_gui")
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=GROUPS, help="Benchmark groups to run")
+    parser.add_argument('--out', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Relative slowdown reported as a regression (exit status 1)")
+    parser.add_argument('--strict', action='store_true',
+                        help="Fail on regressions even when the baseline comes from another Python or machine")
+    args = parser.parse_args()
+
+    from decoders import BACKEND
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'decoder_backend': BACKEND,
+        'recording': args.recording,
+        'results': run(args.ticks, args.messages, args.repeat, args.recording, args.skip_gui, args.only)
+    }
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    changes = compare(report['results'], baseline) if baseline else {}
+    report['vs_baseline'] = changes
+    enforce = bool(baseline) and (args.strict or same_host(report, baseline))
+    if baseline and not enforce:
+        print(f"Baseline is from Python {baseline.get('python')} on {baseline.get('machine')} with "
+              f"{baseline.get('decoder_backend')}; showing the changes without failing (use --strict to fail)")
+
+    regressions = []
+    for name, result in report['results'].items():
+        line = f"{name}: {result['value']:,.2f} {result['unit']}"
+        if name in changes:
+            line += f" ({changes[name]:+.1%} vs baseline)"
+            if changes[name] < -args.tolerance:
+                line += " REGRESSION" if enforce else " (slower)"
+                if enforce:
+                    regressions.append(name)
+        print(line)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose cold import time is tracked
+MODULES = ['trading_logic', 'engine', 'main']
+
+# Runs in a fresh interpreter: build the engine without network clients and push one trade through it
+FIRST_TICK_CODE = """
+import time
+start = time.perf_counter()
+from engine import TradingEngine
+from market_context import FearGreedProvider
+from trading_logic import TradingLogic
+logic = TradingLogic(enable_sentiment=False, fear_greed_provider=FearGreedProvider(cache_path=None))
+engine = TradingEngine(logic)
+engine.process_trade(30000.0)
+print(time.perf_counter() - start)
+"""
+
+
+def _run(code):
+    output = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def import_time(module):
+    return _run(f"import time\nstart = time.perf_counter()\nimport {module}\nprint(time.perf_counter() - start)")
+
+
+def first_tick_time():
+    return _run(FIRST_TICK_CODE)
+
+
+def run(repeat=5):
+    results = {}
+    for module in MODULES:
+        samples = [import_time(module) for _ in range(repeat)]
+        results[f"import_{module}_s"] = statistics.median(samples)
+    results['first_tick_s'] = statistics.median(first_tick_time() for _ in range(repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time and time to the first processed tick")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per measurement (median is kept)")
+    parser.add_argument('--out', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    for name, value in results.items():
+        print(f"{name}: {value * 1000:.1f} ms")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,45 @@
 import matplotlib.pyplot as plt
-import pandas as pd
-import mplfinance as mpf
 import threading
-import websocket
-import json
+from collections import deque
+from datetime import datetime, timezone
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.patches import Rectangle
 import matplotlib.dates as mdates
 
 
+CANDLE_WIDTH = 0.6 / (24 * 60)  # 60% of a 1 minute candle, in days
+UP_COLOR = "#26a69a"
+DOWN_COLOR = "#ef5350"
+
+
 class CandlestickChart:
-    def __init__(self, parent_window):
-        self.root = parent_window  
-        self.price_data = []
-        self.buy_markers = []  
-        self.sell_markers = []  
+    def __init__(self, parent_window, max_candles=100, fps=5, candle_seconds=60):
+        self.root = parent_window
+        self.price_data = deque(maxlen=max_candles)
+        self.buy_markers = deque()  # (time, price), oldest first
+        self.sell_markers = deque()
+        self.market_data = None
+        self.bus = None
+        self.kline_stream = "btcusdt@kline_1m"
+        self.candle_width = CANDLE_WIDTH * candle_seconds / 60
 
         self.fig, self.ax = plt.subplots(figsize=(8, 4))
         self.chart_frame = None
 
+        # Persistent artists, one (body, wick) pair per candle, updated in place
+        self.candle_artists = deque()
+        self.buy_marker_line, = self.ax.plot([], [], linestyle="none", marker="^", color="green", markersize=10)
+        self.sell_marker_line, = self.ax.plot([], [], linestyle="none", marker="v", color="red", markersize=10)
+        self.ax.xaxis_date()
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+
+        # Klines received on the websocket thread, applied on the Tk thread
+        self.pending_klines = []
+        self.pending_lock = threading.Lock()
+        self.markers_dirty = False
+        self.redraw_interval_ms = max(1, int(1000 / fps))
+        self.after_id = None
+
     def create_chart_frame(self, parent_frame):
         self.chart_frame = parent_frame
 
@@ -25,77 +47,120 @@ class CandlestickChart:
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
 
-    def start_candlestick_stream(self):
-        socket = "wss://stream.binance.com:9443/ws/btcusdt@kline_1m"  
-
-        def on_message(ws, message):
-            try:
-                data = json.loads(message)
-                kline = data['k']  
-
-                if kline and kline['x']:
-                    candle = {
-                        'time': pd.to_datetime(kline['t'], unit='ms'),
-                        'open': float(kline['o']),
-                        'high': float(kline['h']),
-                        'low': float(kline['l']),
-                        'close': float(kline['c']),
-                        'volume': float(kline['v'])
-                    }
-                    self.price_data.append(candle)
-
-                    if len(self.price_data) > 100:
-                        self.price_data.pop(0)
-
-                    self.update_candlestick_chart()
-
-            except Exception as e:
-                print(f"WebSocket Error: {e}")
-
-        def on_error(ws, error):
-            print(f"WebSocket Error: {error}")
-
-        def on_close(ws):
-            print("WebSocket closed")
-
-        def on_open(ws):
-            print("WebSocket connection opened")
-
-        self.ws = websocket.WebSocketApp(socket, on_message=on_message, on_error=on_error, on_close=on_close)
-        self.ws.on_open = on_open
-
-        self.socket_thread = threading.Thread(target=self.ws.run_forever)
-        self.socket_thread.start()
-
+        self.after_id = self.root.after(self.redraw_interval_ms, self.update_candlestick_chart)
+
+    # Subscribe to klines on the shared market data connection
+    def start_candlestick_stream(self, market_data):
+        self.market_data = market_data
+        self.market_data.subscribe(self.kline_stream, self.on_kline_message)
+
+    # Draw the engine's own bars (its 'bar' events) instead of opening a kline stream
+    def start_bar_stream(self, bus):
+        self.bus = bus
+        self.bus.subscribe('bar', self.on_kline_message)
+
+    def on_kline_message(self, data):
+        try:
+            self.on_kline(data['k'])
+        except Exception as e:
+            print(f"Kline Error: {e}")
+
+    # Queue a kline update, including updates to the candle that is still open
+    def on_kline(self, kline):
+        candle = {
+            'time': datetime.fromtimestamp(kline['t'] / 1000, tz=timezone.utc),
+            'open': float(kline['o']),
+            'high': float(kline['h']),
+            'low': float(kline['l']),
+            'close': float(kline['c']),
+            'volume': float(kline['v'])
+        }
+        with self.pending_lock:
+            self.pending_klines.append(candle)
+
+    # Apply queued klines to the candle artists and redraw, at most once per frame
     def update_candlestick_chart(self):
-        if len(self.price_data) == 0:
-            return 
-
-        df = pd.DataFrame(self.price_data)
-
-        df.set_index('time', inplace=True)
-
-        self.ax.clear()
-
-        mpf.plot(df, type='candle', ax=self.ax, style='charles', volume=False)
-
-        self.plot_trade_markers()
-
-        self.canvas.draw()
+        with self.pending_lock:
+            candles, self.pending_klines = self.pending_klines, []
+
+        for candle in candles:
+            self.apply_candle(candle)
+        if candles:
+            self.prune_markers()
+
+        if candles or self.markers_dirty:
+            self.plot_trade_markers()
+            self.rescale()
+            self.canvas.draw_idle()
+
+        self.after_id = self.root.after(self.redraw_interval_ms, self.update_candlestick_chart)
+
+    def apply_candle(self, candle):
+        if self.price_data and candle['time'] < self.price_data[-1]['time']:
+            return  # older than the chart, e.g. a late backfill
+        if self.price_data and self.price_data[-1]['time'] == candle['time']:
+            self.price_data[-1] = candle
+            body, wick = self.candle_artists[-1]
+        else:
+            if len(self.price_data) == self.price_data.maxlen:
+                old_body, old_wick = self.candle_artists.popleft()
+                old_body.remove()
+                old_wick.remove()
+            self.price_data.append(candle)
+            body = Rectangle((0, 0), self.candle_width, 0)
+            wick, = self.ax.plot([], [], linewidth=1)
+            self.ax.add_patch(body)
+            self.candle_artists.append((body, wick))
+
+        x = mdates.date2num(candle['time'])
+        color = UP_COLOR if candle['close'] >= candle['open'] else DOWN_COLOR
+        body.set_xy((x - self.candle_width / 2, min(candle['open'], candle['close'])))
+        body.set_height(abs(candle['close'] - candle['open']))
+        body.set_facecolor(color)
+        body.set_edgecolor(color)
+        wick.set_data([x, x], [candle['low'], candle['high']])
+        wick.set_color(color)
+
+    def rescale(self):
+        if not self.price_data:
+            return
+        first = mdates.date2num(self.price_data[0]['time'])
+        last = mdates.date2num(self.price_data[-1]['time'])
+        low = min(candle['low'] for candle in self.price_data)
+        high = max(candle['high'] for candle in self.price_data)
+        padding = (high - low) * 0.05 or 1
+        self.ax.set_xlim(first - self.candle_width, last + self.candle_width)
+        self.ax.set_ylim(low - padding, high + padding)
 
     def mark_trade_action(self, price, action, timestamp):
         if action == "Buy":
             self.buy_markers.append((timestamp, price))
         elif action == "Sell":
             self.sell_markers.append((timestamp, price))
+        self.markers_dirty = True
+
+    # Drop markers that are older than the first candle still on the chart
+    def prune_markers(self):
+        if not self.price_data:
+            return
+        first = self.price_data[0]['time']
+        for markers in (self.buy_markers, self.sell_markers):
+            while markers and markers[0][0] < first:
+                markers.popleft()
+                self.markers_dirty = True
 
     def plot_trade_markers(self):
-        for timestamp, price in self.buy_markers:
-            self.ax.plot(mdates.date2num(timestamp), price, marker="^", color="green", markersize=10)
-
-        for timestamp, price in self.sell_markers:
-            self.ax.plot(mdates.date2num(timestamp), price, marker="v", color="red", markersize=10)
+        self.buy_marker_line.set_data([mdates.date2num(t) for t, _ in self.buy_markers],
+                                      [price for _, price in self.buy_markers])
+        self.sell_marker_line.set_data([mdates.date2num(t) for t, _ in self.sell_markers],
+                                       [price for _, price in self.sell_markers])
+        self.markers_dirty = False
 
     def stop_stream(self):
-        if self.ws:
-            self.ws.close()
\ No newline at end of file
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        if self.market_data:
+            self.market_data.unsubscribe(self.kline_stream, self.on_kline_message)
+        if self.bus:
+            self.bus.unsubscribe('bar', self.on_kline_message)
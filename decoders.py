@@ -0,0 +1,111 @@
+import json
+import os
+
+
+# orjson when it is installed (unless JSON_DECODER=stdlib), the standard library otherwise
+def _select_backend():
+    if os.environ.get('JSON_DECODER', 'auto') != 'stdlib':
+        try:
+            import orjson
+            return 'orjson', orjson.loads
+        except ImportError:
+            pass
+    return 'json', json.loads
+
+
+BACKEND, loads = _select_backend()
+
+
+# The fields of a trade message the bot uses, already converted
+class TradeRecord:
+    __slots__ = ('event_time', 'trade_time', 'price', 'qty', 'buyer_maker')
+
+    def __init__(self, event_time, trade_time, price, qty, buyer_maker):
+        self.event_time = event_time
+        self.trade_time = trade_time
+        self.price = price
+        self.qty = qty
+        self.buyer_maker = buyer_maker
+
+    def __repr__(self):
+        return f"TradeRecord({self.trade_time}, {self.price}, {self.qty})"
+
+
+class KlineRecord:
+    __slots__ = ('event_time', 'open_time', 'close_time', 'open', 'high', 'low', 'close', 'volume', 'closed')
+
+    def __init__(self, event_time, open_time, close_time, open, high, low, close, volume, closed):
+        self.event_time = event_time
+        self.open_time = open_time
+        self.close_time = close_time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.closed = closed
+
+
+# Split a combined-stream frame into (stream, data); (None, None) for replies to SUBSCRIBE
+def decode_message(message):
+    envelope = loads(message)
+    stream = envelope.get('stream')
+    if stream is None:
+        return None, None
+    return stream, envelope['data']
+
+
+def decode_trade(data):
+    trade_time = data.get('T')
+    return TradeRecord(data.get('E', trade_time), trade_time, float(data['p']), float(data.get('q', 0.0)),
+                       bool(data.get('m')))
+
+
+def decode_kline(data):
+    kline = data['k']
+    return KlineRecord(data.get('E', kline['T']), kline['t'], kline['T'], float(kline['o']), float(kline['h']),
+                       float(kline['l']), float(kline['c']), float(kline['v']), bool(kline['x']))
+
+
+def _parse_batch(messages):
+    messages = list(messages)
+    if not messages:
+        return []
+    # One parser call for the whole batch
+    if isinstance(messages[0], bytes):
+        envelopes = loads(b'[' + b','.join(messages) + b']')
+    else:
+        envelopes = loads('[' + ','.join(messages) + ']')
+    return [envelope.get('data', envelope) for envelope in envelopes if 'result' not in envelope]
+
+
+# Decode a batch of trade frames (combined-stream or bare) into arrays named and typed like
+# tick_store.TRADE_COLUMNS. Price and quantity strings are converted by NumPy in one pass.
+def decode_trade_batch(messages):
+    import numpy as np
+    data = _parse_batch(messages)
+    count = len(data)
+    return {
+        'event_time': np.fromiter((d.get('E', d['T']) for d in data), dtype=np.int64, count=count),
+        'trade_time': np.fromiter((d['T'] for d in data), dtype=np.int64, count=count),
+        'price': np.array([d['p'] for d in data], dtype=np.float64),
+        'qty': np.array([d['q'] for d in data], dtype=np.float64),
+        'side': np.fromiter((-1 if d.get('m') else 1 for d in data), dtype=np.int8, count=count)
+    }
+
+
+# Decode a batch of kline frames into arrays named and typed like tick_store.KLINE_COLUMNS
+def decode_kline_batch(messages):
+    import numpy as np
+    data = _parse_batch(messages)
+    klines = [d['k'] for d in data]
+    count = len(data)
+    columns = {
+        'event_time': np.fromiter((d.get('E', d['k']['T']) for d in data), dtype=np.int64, count=count),
+        'open_time': np.fromiter((k['t'] for k in klines), dtype=np.int64, count=count),
+        'close_time': np.fromiter((k['T'] for k in klines), dtype=np.int64, count=count),
+        'closed': np.fromiter((1 if k['x'] else 0 for k in klines), dtype=np.int8, count=count)
+    }
+    for name, key in (('open', 'o'), ('high', 'h'), ('low', 'l'), ('close', 'c'), ('volume', 'v')):
+        columns[name] = np.array([k[key] for k in klines], dtype=np.float64)
+    return columns
@@ -0,0 +1,365 @@
+import argparse
+import os
+import time
+from datetime import datetime, timezone
+
+from bar_aggregator import parse_bar_spec
+from decoders import decode_kline, decode_trade
+from event_bus import EventBus
+from execution import EXECUTION_KINDS, make_executor
+from latency import monitor, start_reporting_from_env
+from market_data import MarketDataClient
+from trading_logic import TradingLogic, load_environment
+
+
+# Runs the feed -> strategy -> execution loop without any UI and publishes
+# 'tick', 'trade' and 'status' events on an EventBus. With a Ledger the state
+# is restored on construction and every trade is persisted.
+#
+# With a BarAggregator the strategy runs once per closed bar instead of once per
+# trade, and 'bar' events (kline-shaped, see Bar.to_kline) are published for the
+# closed bars and, at most every bar_update_interval seconds, the bar in progress.
+#
+# The 1m kline stream is subscribed as well, for the closed klines the market data
+# client backfills from REST after a reconnect. They fill the gap in the indicator
+# windows, and in the bars, that the missed trades would otherwise leave.
+class TradingEngine:
+    def __init__(self, logic=None, bus=None, symbol="btcusdt", market_data=None, ledger=None, bars=None,
+                 bar_update_interval=0.2):
+        self.logic = logic or TradingLogic()
+        self.bus = bus or EventBus()
+        self.symbol = symbol.lower()
+        self.trade_stream = f"{self.symbol}@trade"
+        self.kline_stream = f"{self.symbol}@kline_1m"
+        self.running = False
+        self.bars = bars
+        self.bar_update_interval = bar_update_interval
+        self._last_bar_update = 0.0
+        self._last_trade_ms = None  # exchange time of the latest trade (or backfilled kline) fed in
+
+        # A client passed in is shared with other feeds and started/stopped by its owner
+        self.owns_market_data = market_data is None
+        self.market_data = market_data or MarketDataClient()
+        # Recorded exchange timestamps say nothing about the current lag
+        self.replaying = getattr(self.market_data, 'replaying', False)
+
+        self.ledger = ledger
+        if ledger is not None:
+            if ledger.restore(self.logic):
+                print(f"Restored state from {ledger.path}: {self.logic.last_trade}")
+            ledger.attach(self.bus, self.logic)
+
+        # Order execution backends may need market data of their own (e.g. the book depth)
+        if self.logic.executor is not None:
+            self.logic.executor.attach(self.market_data, self.symbol)
+
+    # Streams worth recording to replay this engine's session
+    def recorded_streams(self):
+        streams = [self.trade_stream, self.kline_stream]
+        if self.logic.executor is not None:
+            streams += [stream for stream in self.logic.executor.streams() if stream not in streams]
+        return streams
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        print("Trading started")
+
+        # An asyncio runtime schedules the context refreshes on its own loop
+        if hasattr(self.market_data, 'add_refresher'):
+            for refresher in self.logic.context_refreshers():
+                self.market_data.add_refresher(refresher)
+        else:
+            self.logic.start_market_context()
+            self.logic.start_sentiment()
+
+        self.market_data.subscribe(self.trade_stream, self._on_trade)
+        self.market_data.subscribe(self.kline_stream, self._on_kline)
+        if self.owns_market_data:
+            self.market_data.start()
+        self.bus.publish('status', {'running': True})
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        print("Trading stopped")
+
+        if hasattr(self.market_data, 'remove_refresher'):
+            for refresher in self.logic.context_refreshers():
+                self.market_data.remove_refresher(refresher)
+        else:
+            self.logic.stop_sentiment()
+            self.logic.stop_market_context()
+        self.market_data.unsubscribe(self.trade_stream, self._on_trade)
+        self.market_data.unsubscribe(self.kline_stream, self._on_kline)
+        if self.owns_market_data:
+            self.market_data.stop()
+        self.bus.publish('status', {'running': False})
+
+    # Block the calling thread until stop() is called, a replay runs out or the process is interrupted
+    def run_forever(self):
+        self.start()
+        self.market_data.start()
+        try:
+            while self.running and self.market_data.running:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    # Feed one trade price through the strategy and publish the outcome
+    def process_trade(self, price, timestamp=None):
+        timestamp = timestamp or datetime.now().astimezone()
+        if self.logic.executor is not None:
+            self.apply_fills(timestamp)
+        start = monitor.now()
+        self.logic.update_price_data(price)
+        monitor.record('update_price_data', start)
+
+        start = monitor.now()
+        decision, reason, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score = self.logic.apply_trading_logic()
+        monitor.record('apply_trading_logic', start)
+        state = self.logic.get_state()
+
+        start = monitor.now()
+        self.bus.publish('tick', {
+            'time': timestamp,
+            'price': price,
+            'decision': decision,
+            'reason': reason,
+            'sma_score': sma_score,
+            'fear_greed_score': fear_greed_score,
+            'sentiment_score': sentiment_score,
+            'buy_score': buy_score,
+            'sell_score': sell_score,
+            'state': state
+        })
+
+        if decision != "Hold" and self.logic.executor is not None:
+            # Only submitted; the 'trade' event follows once the order is done
+            self.bus.publish('order', {
+                'time': timestamp,
+                'price': price,
+                'decision': decision,
+                'order': self.logic.pending_order
+            })
+        elif decision != "Hold":
+            self.bus.publish('trade', {
+                'time': timestamp,
+                'price': price,
+                'decision': decision,
+                'action': state['last_trade'],
+                'balance': state['balance'],
+                'btc_position': state['btc_position']
+            })
+        monitor.record('publish', start)
+        return decision
+
+    def _on_trade(self, data):
+        try:
+            if not self.running:
+                return
+
+            trade = decode_trade(data)
+            if trade.trade_time is not None:
+                self._last_trade_ms = trade.trade_time
+            if self.bars is None:
+                self.process_trade(trade.price, _local_time(trade.trade_time))
+            else:
+                self._on_bar_trade(trade)
+            if trade.event_time is not None and not self.replaying:
+                monitor.record_lag('exchange_to_decision', trade.event_time)
+
+        except KeyError as e:
+            print(f"KeyError: {e}")
+        except ValueError as e:
+            print(f"ValueError: {e}")
+        except Exception as e:
+            print(f"Unexpected WebSocket Error: {e}")
+
+
+    # Backfilled klines (live klines are left to the chart). Only klines that closed and
+    # opened after the latest trade seen are used, so nothing is counted twice; their
+    # closes go into the indicator windows without evaluating the strategy on stale prices.
+    def _on_kline(self, data):
+        try:
+            if not self.running or not data.get('backfill'):
+                return
+            kline = decode_kline(data)
+            if not kline.closed or (self._last_trade_ms is not None and kline.open_time <= self._last_trade_ms):
+                return
+            self._last_trade_ms = kline.close_time
+            if self.bars is None:
+                self.logic.update_price_data(kline.close)
+            else:
+                self._backfill_bars(kline)
+        except (KeyError, ValueError) as e:
+            print(f"Error backfilling kline: {e}")
+
+    # Apply the executor's fills to the strategy state and publish a 'fill' event for each
+    # fill and a 'trade' event for each order that finished with something filled
+    def apply_fills(self, timestamp=None):
+        fills, finished = self.logic.apply_fills()
+        if not fills and not finished:
+            return
+        timestamp = timestamp or datetime.now().astimezone()
+        state = self.logic.get_state()
+        for fill in fills:
+            self.bus.publish('fill', {
+                'time': timestamp,
+                'side': fill.side,
+                'price': fill.price,
+                'quantity': fill.quantity,
+                'fee': fill.fee,
+                'fee_asset': fill.fee_asset,
+                'liquidity': fill.liquidity,
+                'balance': state['balance'],
+                'btc_position': state['btc_position']
+            })
+        for order in finished:
+            if order.filled:
+                self.bus.publish('trade', {
+                    'time': timestamp,
+                    'price': order.average_price,
+                    'decision': order.side.capitalize(),
+                    'action': state['last_trade'],
+                    'balance': state['balance'],
+                    'btc_position': state['btc_position']
+                })
+
+    # Aggregate a trade and run the strategy on the close of the bar it completes
+    def _on_bar_trade(self, trade):
+        if self.logic.executor is not None:
+            self.apply_fills()
+        start = monitor.now()
+        bar = self.bars.update(trade.price, trade.qty, trade.trade_time)
+        monitor.record('bar_update', start)
+
+        if bar is not None:
+            self.bus.publish('bar', {'s': self.symbol.upper(), 'k': bar.to_kline()})
+            self.process_trade(bar.close, _local_time(bar.close_time))
+
+        now = time.monotonic()
+        if bar is not None or now - self._last_bar_update >= self.bar_update_interval:
+            self._last_bar_update = now
+            current = self.bars.current
+            if current is not None:
+                self.bus.publish('bar', {'s': self.symbol.upper(), 'k': current.to_kline()})
+
+    # Replay a backfilled kline into the bar aggregator as four trades (open, high, low and
+    # close, a quarter of the volume each). Bars it closes are published and their closes go
+    # into the indicator windows; the bar in progress is published once at the end. Bars
+    # shorter than the kline interval can only be approximated this way.
+    def _backfill_bars(self, kline):
+        quarter = kline.volume / 4
+        for price, time_ms in ((kline.open, kline.open_time), (kline.high, kline.open_time),
+                               (kline.low, kline.open_time), (kline.close, kline.close_time)):
+            bar = self.bars.update(price, quarter, time_ms)
+            if bar is not None:
+                self.bus.publish('bar', {'s': self.symbol.upper(), 'k': bar.to_kline()})
+                self.logic.update_price_data(bar.close)
+        current = self.bars.current
+        if current is not None:
+            self.bus.publish('bar', {'s': self.symbol.upper(), 'k': current.to_kline()})
+
+
+# Exchange milliseconds as a local datetime, or None to use the current time
+def _local_time(exchange_ms):
+    if exchange_ms is None:
+        return None
+    return datetime.fromtimestamp(exchange_ms / 1000, tz=timezone.utc).astimezone()
+
+
+# Print executed trades when running without the GUI
+def _log_trade(event):
+    print(f"{event['time']:%H:%M:%S} {event['action']} | "
+          f"Balance: ${event['balance']:.2f} | Position: {event['btc_position']:.6f}")
+
+
+# The ledger an entry point should use: an explicit path, or the default one unless
+# persistence is switched off or a recording is being replayed
+def open_ledger(path=None, disabled=False, replaying=False):
+    if disabled or (path is None and replaying):
+        return None
+    from ledger import Ledger
+    return Ledger(path or os.environ.get('TRADING_LEDGER', 'trading_ledger.db'))
+
+
+# The feed, ledger, bar and execution options shared by engine.py and main.py
+def add_runtime_arguments(parser):
+    parser.add_argument('--replay', help="Directory of recorded ticks to replay instead of the live feed")
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed multiplier, 0 for as fast as possible")
+    parser.add_argument('--record', help="Directory to record the trade and kline streams to")
+    parser.add_argument('--ledger', default=None,
+                        help="SQLite file for the trade ledger and state snapshots (default: TRADING_LEDGER "
+                             "or trading_ledger.db, not used when replaying)")
+    parser.add_argument('--no-ledger', action='store_true', help="Don't persist or restore state")
+    parser.add_argument('--bars', default=None,
+                        help="Evaluate the strategy on bars: 1s, 1m, 5m, ..., volume:<qty>, dollar:<amount> "
+                             "or tick for every trade (default: BAR_SPEC or 1m)")
+    parser.add_argument('--execution', choices=EXECUTION_KINDS, default='instant',
+                        help="instant fills at the last price, paper trading against the order book, or live orders "
+                             "(buys are sized from the strategy's simulated balance, not the account balance)")
+    parser.add_argument('--exchange-url', help="REST endpoint for live orders, e.g. a local mock_exchange.py")
+    parser.add_argument('--threaded', action='store_true',
+                        help="Use the thread-based websocket client instead of the asyncio runtime")
+
+
+# The executor, market data client, ledger and bar aggregator the runtime options
+# ask for. Invalid combinations are reported through parser.error.
+def build_runtime(args, parser):
+    if args.execution == 'live' and args.replay:
+        parser.error("--execution live can't be used with --replay")
+    load_environment()
+    try:
+        executor = make_executor(args.execution, args.exchange_url)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.execution == 'live':
+        print("Live execution: buys spend the strategy's simulated balance, not the account balance")
+
+    if args.replay:
+        from tick_store import ReplayFeed
+        market_data = ReplayFeed(args.replay, args.speed)
+    elif args.threaded:
+        market_data = MarketDataClient()
+    else:
+        from async_runtime import AsyncMarketData
+        market_data = AsyncMarketData()
+    ledger = open_ledger(args.ledger, args.no_ledger, args.replay)
+    bars = parse_bar_spec(args.bars or os.environ.get('BAR_SPEC', '1m'))
+    return executor, market_data, ledger, bars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the trading bot without the GUI")
+    add_runtime_arguments(parser)
+    args = parser.parse_args()
+
+    from tick_store import TickRecorder
+    executor, market_data, ledger, bars = build_runtime(args, parser)
+    engine = TradingEngine(TradingLogic(executor=executor), market_data=market_data, ledger=ledger, bars=bars)
+    engine.bus.subscribe('trade', _log_trade)
+    start_reporting_from_env()
+
+    recorder = None
+    if args.record:
+        recorder = TickRecorder(args.record)
+        recorder.attach(market_data, engine.recorded_streams())
+    try:
+        engine.run_forever()
+    finally:
+        market_data.stop()
+        if recorder:
+            recorder.close()
+        if ledger:
+            ledger.close()
+        if executor:
+            executor.stop()
+
+
+if __name__ == "__main__":
+    main()
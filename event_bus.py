@@ -0,0 +1,43 @@
+import queue
+import threading
+
+
+# Minimal publish/subscribe hub. The engine publishes on its own thread; subscribers
+# that must not slow it down (like the GUI) should take a queue instead of a callback.
+class EventBus:
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic, callback):
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append(callback)
+        return callback
+
+    def unsubscribe(self, topic, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(topic, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    # Deliver events for a topic into a bounded queue; events are dropped when it is full
+    def subscribe_queue(self, topic, maxsize=1000):
+        events = queue.Queue(maxsize=maxsize)
+
+        def enqueue(event):
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+
+        self.subscribe(topic, enqueue)
+        return events
+
+    def publish(self, topic, event):
+        with self._lock:
+            callbacks = list(self._subscribers.get(topic, ()))
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error in {topic} subscriber: {e}")
@@ -0,0 +1,524 @@
+import hashlib
+import hmac
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR, Decimal
+from urllib.parse import urlencode
+
+
+BUY = 'BUY'
+SELL = 'SELL'
+MARKET = 'MARKET'
+LIMIT = 'LIMIT'
+DEPTH_LEVELS = 10
+
+
+# An order and its execution progress. Market buys may give quote_quantity (USD to
+# spend, like Binance's quoteOrderQty) instead of a base quantity.
+class Order:
+    _ids = itertools.count(1)
+
+    def __init__(self, side, quantity=None, quote_quantity=None, order_type=MARKET, price=None):
+        if side not in (BUY, SELL):
+            raise ValueError(f"Unknown order side: {side}")
+        if (quantity is None) == (quote_quantity is None):
+            raise ValueError("Give exactly one of quantity and quote_quantity")
+        if order_type == LIMIT and (price is None or quote_quantity is not None):
+            raise ValueError("Limit orders need a price and a base quantity")
+        self.id = next(Order._ids)
+        self.side = side
+        self.quantity = quantity
+        self.quote_quantity = quote_quantity
+        self.type = order_type
+        self.price = price
+        self.status = 'NEW'
+        self.filled = 0.0  # base
+        self.spent = 0.0  # quote
+        self.fees = 0.0
+        self.fills = []
+
+    @property
+    def average_price(self):
+        return self.spent / self.filled if self.filled else None
+
+    def remaining(self):
+        if self.quote_quantity is not None:
+            return self.quote_quantity - self.spent
+        return self.quantity - self.filled
+
+    def __repr__(self):
+        return f"Order({self.id}, {self.side}, {self.type}, status={self.status}, filled={self.filled:.8f})"
+
+
+class Fill:
+    __slots__ = ('order_id', 'side', 'price', 'quantity', 'fee', 'fee_asset', 'liquidity', 'time')
+
+    def __init__(self, order_id, side, price, quantity, fee, fee_asset, liquidity, timestamp=None):
+        self.order_id = order_id
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.fee = fee
+        self.fee_asset = fee_asset  # 'BASE', 'QUOTE' or the name of another asset
+        self.liquidity = liquidity  # 'maker' or 'taker'
+        self.time = time.time() if timestamp is None else timestamp
+
+    @property
+    def quote(self):
+        return self.price * self.quantity
+
+    def __repr__(self):
+        return f"Fill({self.side} {self.quantity:.8f} @ {self.price:.2f}, fee={self.fee:.8f} {self.fee_asset})"
+
+
+def _record_fill(order, fill):
+    order.fills.append(fill)
+    order.filled += fill.quantity
+    order.spent += fill.quote
+    order.fees += fill.fee
+
+
+# Price levels of one symbol, best first on each side, from partial book depth
+# snapshots (the <symbol>@depth<N> streams or recorded copies of them)
+class OrderBook:
+    def __init__(self):
+        self.bids = []  # [[price, quantity]], highest first
+        self.asks = []  # lowest first
+        self.updated = 0.0
+
+    def apply_snapshot(self, data):
+        self.bids = [[float(price), float(quantity)] for price, quantity in data['bids']]
+        self.asks = [[float(price), float(quantity)] for price, quantity in data['asks']]
+        self.updated = time.time()
+
+    def best(self, side):
+        levels = self.asks if side == BUY else self.bids
+        return levels[0][0] if levels else None
+
+    # Take liquidity for an aggressive order, up to limit_price if given. Returns
+    # [(price, base quantity)] and removes what was taken, so orders placed before the
+    # next snapshot see the depleted book.
+    def take(self, side, quantity=None, quote_quantity=None, limit_price=None):
+        levels = self.asks if side == BUY else self.bids
+        taken = []
+        while levels and (quantity is None or quantity > 1e-12) and (quote_quantity is None or quote_quantity > 1e-9):
+            price, available = levels[0]
+            if limit_price is not None and (price > limit_price if side == BUY else price < limit_price):
+                break
+            size = available if quantity is None else min(available, quantity)
+            if quote_quantity is not None:
+                size = min(size, quote_quantity / price)
+                quote_quantity -= size * price
+            if quantity is not None:
+                quantity -= size
+            taken.append((price, size))
+            if size >= available - 1e-12:
+                levels.pop(0)
+            else:
+                levels[0][1] = available - size
+        return taken
+
+
+# The order rules of one symbol from /api/v3/exchangeInfo: LOT_SIZE (step size and min
+# quantity), PRICE_FILTER (tick size), MIN_NOTIONAL or NOTIONAL, and the quote asset
+# precision. Values are kept as Decimals so rounding matches the exchange's exactly.
+class SymbolFilters:
+    def __init__(self, step_size='0', min_qty='0', tick_size='0', min_notional='0', quote_precision=8):
+        self.step_size = Decimal(step_size)
+        self.min_qty = Decimal(min_qty)
+        self.tick_size = Decimal(tick_size)
+        self.min_notional = Decimal(min_notional)
+        self.quote_precision = int(quote_precision)
+
+    @classmethod
+    def from_exchange_info(cls, symbol_info):
+        filters = {f['filterType']: f for f in symbol_info.get('filters', [])}
+        lot = filters.get('LOT_SIZE', {})
+        price = filters.get('PRICE_FILTER', {})
+        notional = filters.get('NOTIONAL') or filters.get('MIN_NOTIONAL') or {}
+        return cls(lot.get('stepSize', '0'), lot.get('minQty', '0'), price.get('tickSize', '0'),
+                   notional.get('minNotional', '0'),
+                   symbol_info.get('quoteAssetPrecision', symbol_info.get('quotePrecision', 8)))
+
+    # Quantities never round up, so an order doesn't ask for more than the balance holds
+    def floor_quantity(self, quantity):
+        return _to_step(quantity, self.step_size, ROUND_FLOOR)
+
+    def floor_quote(self, quote):
+        return Decimal(repr(quote)).quantize(Decimal(1).scaleb(-self.quote_precision), rounding=ROUND_DOWN)
+
+    # Limit prices round away from the market: down for buys, up for sells
+    def round_price(self, price, side):
+        return _to_step(price, self.tick_size, ROUND_FLOOR if side == BUY else ROUND_CEILING)
+
+    # The quantity, quoteOrderQty and price parameters of an order. reference_price (the
+    # last trade) values market orders for the notional check; without it that check is
+    # left to the exchange.
+    def apply(self, order, reference_price=None):
+        params = {}
+        price = None
+        if order.type == LIMIT:
+            price = self.round_price(order.price, order.side)
+            params['price'] = format(price, 'f')
+        elif reference_price:
+            price = Decimal(repr(reference_price))
+
+        if order.quote_quantity is not None:
+            quote = self.floor_quote(order.quote_quantity)
+            if quote <= 0 or quote < self.min_notional:
+                raise ValueError(f"Filter failure: MIN_NOTIONAL ({quote} < {self.min_notional})")
+            params['quoteOrderQty'] = format(quote, 'f')
+            return params
+
+        quantity = self.floor_quantity(order.quantity)
+        if quantity <= 0 or quantity < self.min_qty:
+            raise ValueError(f"Filter failure: LOT_SIZE ({order.quantity} floors to {quantity}, "
+                             f"minimum {self.min_qty})")
+        if price is not None and quantity * price < self.min_notional:
+            raise ValueError(f"Filter failure: MIN_NOTIONAL ({quantity * price} < {self.min_notional})")
+        params['quantity'] = format(quantity, 'f')
+        return params
+
+
+def _to_step(value, step, rounding):
+    value = Decimal(repr(value))
+    if step <= 0:
+        return value
+    return (value / step).to_integral_value(rounding=rounding) * step
+
+
+# Common API of the execution backends. submit() never blocks: fills and the final
+# order are reported through the callbacks, on the backend's own thread.
+class ExecutionBackend:
+    def submit(self, order, on_fill=None, on_done=None):
+        raise NotImplementedError
+
+    def cancel(self, order_id):
+        raise NotImplementedError
+
+    # Subscribe to the market data the backend needs
+    def attach(self, market_data, symbol):
+        pass
+
+    def detach(self):
+        pass
+
+    # Streams subscribed by attach()
+    def streams(self):
+        return []
+
+    # Smallest base quantity the backend can sell; a position below it is dust
+    def min_quantity(self):
+        return 0.0
+
+    def stop(self):
+        pass
+
+
+# Paper trading against the recorded or live order book. Orders reach the simulated
+# exchange after `latency` seconds, market orders walk the book level by level (partial
+# fills, slippage, what is left of an empty book expires), and limit orders either take
+# liquidity on arrival or rest and fill as maker against later trades at their price.
+class PaperExecution(ExecutionBackend):
+    def __init__(self, latency=0.05, maker_fee=0.001, taker_fee=0.001, book=None):
+        self.latency = latency
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.book = book or OrderBook()
+        self.last_price = None
+
+        self._resting = {}  # order id -> (order, on_fill, on_done)
+        self._scheduled = []  # heap of (due, sequence, order, on_fill, on_done)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._subscriptions = []
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, order, on_fill=None, on_done=None):
+        with self._condition:
+            heapq.heappush(self._scheduled, (time.monotonic() + self.latency, next(self._sequence), order, on_fill,
+                                             on_done))
+            self._condition.notify()
+        return order
+
+    def cancel(self, order_id):
+        with self._condition:
+            entry = self._resting.pop(order_id, None)
+        if entry:
+            order, _, on_done = entry
+            order.status = 'PARTIALLY_FILLED_CANCELED' if order.filled else 'CANCELED'
+            _notify(on_done, order)
+        return entry is not None
+
+    def attach(self, market_data, symbol):
+        symbol = symbol.lower()
+        for stream, callback in ((f"{symbol}@depth{DEPTH_LEVELS}@100ms", self.on_depth),
+                                 (f"{symbol}@trade", self.on_trade)):
+            market_data.subscribe(stream, callback)
+            self._subscriptions.append((market_data, stream, callback))
+
+    def detach(self):
+        for market_data, stream, callback in self._subscriptions:
+            market_data.unsubscribe(stream, callback)
+        self._subscriptions = []
+
+    def streams(self):
+        return [stream for _, stream, _ in self._subscriptions]
+
+    def stop(self):
+        self.detach()
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+    def on_depth(self, data):
+        with self._condition:
+            self.book.apply_snapshot(data)
+
+    # Fill resting limit orders that a market trade reached
+    def on_trade(self, data):
+        price, quantity = float(data['p']), float(data['q'])
+        notifications = []
+        with self._condition:
+            self.last_price = price
+            for order_id, (order, on_fill, on_done) in list(self._resting.items()):
+                crossed = price <= order.price if order.side == BUY else price >= order.price
+                if not crossed or quantity <= 0:
+                    continue
+                size = min(order.remaining(), quantity)
+                quantity -= size
+                notifications.append((on_fill, self._fill(order, order.price, size, 'maker')))
+                if order.remaining() <= 1e-12:
+                    order.status = 'FILLED'
+                    del self._resting[order_id]
+                    notifications.append((on_done, order))
+                else:
+                    order.status = 'PARTIALLY_FILLED'
+        for callback, value in notifications:
+            _notify(callback, value)
+
+    def _fill(self, order, price, quantity, liquidity):
+        rate = self.maker_fee if liquidity == 'maker' else self.taker_fee
+        # Binance charges the fee in the asset received
+        if order.side == BUY:
+            fill = Fill(order.id, order.side, price, quantity, quantity * rate, 'BASE', liquidity)
+        else:
+            fill = Fill(order.id, order.side, price, quantity, price * quantity * rate, 'QUOTE', liquidity)
+        _record_fill(order, fill)
+        return fill
+
+    # Match an order that has just reached the simulated exchange
+    def _execute(self, order, on_fill, on_done):
+        with self._condition:
+            if order.type == MARKET and not self.book.asks and not self.book.bids and self.last_price is not None:
+                # No depth data: fill at the last trade price
+                quantity = order.quantity if order.quantity is not None else order.quote_quantity / self.last_price
+                levels = [(self.last_price, quantity)]
+            elif order.quote_quantity is not None:
+                levels = self.book.take(order.side, quote_quantity=order.quote_quantity)
+            else:
+                levels = self.book.take(order.side, quantity=order.quantity,
+                                        limit_price=order.price if order.type == LIMIT else None)
+            fills = [self._fill(order, price, quantity, 'taker') for price, quantity in levels]
+
+            if order.remaining() <= 1e-9:
+                order.status = 'FILLED'
+            elif order.type == LIMIT:
+                order.status = 'PARTIALLY_FILLED' if fills else 'NEW'
+                self._resting[order.id] = (order, on_fill, on_done)
+            else:
+                order.status = 'PARTIALLY_FILLED_EXPIRED' if fills else 'EXPIRED'
+
+        for fill in fills:
+            _notify(on_fill, fill)
+        if order.id not in self._resting:
+            _notify(on_done, order)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and (not self._scheduled or self._scheduled[0][0] > time.monotonic()):
+                    timeout = self._scheduled[0][0] - time.monotonic() if self._scheduled else None
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                _, _, order, on_fill, on_done = heapq.heappop(self._scheduled)
+            self._execute(order, on_fill, on_done)
+
+
+def _notify(callback, value):
+    if callback is None:
+        return
+    try:
+        callback(value)
+    except Exception as e:
+        print(f"Error in execution callback: {e}")
+
+
+# Orders placed on a Binance-compatible REST API (POST /api/v3/order, signed with
+# HMAC-SHA256). Requests run on a small thread pool; the fills of the FULL response
+# are reported through the same callbacks as the paper backend.
+class LiveExecution(ExecutionBackend):
+    def __init__(self, api_key, api_secret, base_asset="BTC", quote_asset="USDT", base_url="https://api.binance.com",
+                 session=None, timeout=10, recv_window=5000, workers=2, filters=None):
+        self.api_key = api_key
+        self.api_secret = api_secret.encode()
+        self.base_asset = base_asset.upper()
+        self.quote_asset = quote_asset.upper()
+        self.symbol = self.base_asset + self.quote_asset
+        self.base_url = base_url.rstrip('/')
+        self.session = session  # created on the first request
+        self.timeout = timeout
+        self.recv_window = recv_window
+        self.last_price = None  # reference price for the notional of market orders
+        self._filters = filters  # SymbolFilters, fetched from exchangeInfo on first use
+        self._filters_lock = threading.Lock()
+        self._subscriptions = []
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='execution')
+
+    # Fetch the symbol's filters in the background and follow the last trade price
+    def attach(self, market_data, symbol):
+        stream = f"{symbol.lower()}@trade"
+        market_data.subscribe(stream, self.on_trade)
+        self._subscriptions.append((market_data, stream, self.on_trade))
+        self._pool.submit(self.filters)
+
+    def detach(self):
+        for market_data, stream, callback in self._subscriptions:
+            market_data.unsubscribe(stream, callback)
+        self._subscriptions = []
+
+    def streams(self):
+        return [stream for _, stream, _ in self._subscriptions]
+
+    def on_trade(self, data):
+        self.last_price = float(data['p'])
+
+    # The symbol's SymbolFilters, fetched once from /api/v3/exchangeInfo (blocking). A failed
+    # fetch is retried on the next call; until then orders go out unfiltered.
+    def filters(self):
+        with self._filters_lock:
+            if self._filters is None:
+                try:
+                    response = self._session().get(f"{self.base_url}/api/v3/exchangeInfo",
+                                                   params={'symbol': self.symbol}, timeout=self.timeout)
+                    response.raise_for_status()
+                    self._filters = SymbolFilters.from_exchange_info(response.json()['symbols'][0])
+                except Exception as e:
+                    print(f"Error fetching the {self.symbol} filters: {e}")
+            return self._filters
+
+    def min_quantity(self):
+        filters = self._filters
+        return float(filters.min_qty) if filters else 0.0
+
+    def _session(self):
+        if self.session is None:
+            from market_context import make_session
+            self.session = make_session(retries=0)
+        return self.session
+
+    def _signed(self, params):
+        params = dict(params, timestamp=int(time.time() * 1000), recvWindow=self.recv_window)
+        query = urlencode(params)
+        signature = hmac.new(self.api_secret, query.encode(), hashlib.sha256).hexdigest()
+        return f"{query}&signature={signature}"
+
+    # Request parameters of an order, rounded to the symbol's filters once they are known.
+    # Raises ValueError for an order the exchange would reject (below min quantity or notional).
+    def order_params(self, order):
+        params = {'symbol': self.symbol, 'side': order.side, 'type': order.type, 'newOrderRespType': 'FULL',
+                  'newClientOrderId': f"bot-{order.id}"}
+        filters = self.filters()
+        if filters is not None:
+            params.update(filters.apply(order, self.last_price))
+            if order.type == LIMIT:
+                params['timeInForce'] = 'GTC'
+            return params
+        if order.quote_quantity is not None:
+            params['quoteOrderQty'] = f"{order.quote_quantity:.8f}"
+        else:
+            params['quantity'] = f"{order.quantity:.8f}"
+        if order.type == LIMIT:
+            params.update(price=f"{order.price:.2f}", timeInForce='GTC')
+        return params
+
+    def submit(self, order, on_fill=None, on_done=None):
+        self._pool.submit(self._place, order, on_fill, on_done)
+        return order
+
+    def _place(self, order, on_fill, on_done):
+        try:
+            params = self.order_params(order)
+        except ValueError as e:
+            print(f"Order {order.id} not sent: {e}")
+            order.status = 'REJECTED'
+            _notify(on_done, order)
+            return
+        try:
+            response = self._session().post(f"{self.base_url}/api/v3/order?{self._signed(params)}",
+                                            headers={'X-MBX-APIKEY': self.api_key}, timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+        except Exception as e:
+            print(f"Error placing order {order.id}: {e}")
+            order.status = 'REJECTED'
+            _notify(on_done, order)
+            return
+
+        for row in result.get('fills', []):
+            price, quantity = float(row['price']), float(row['qty'])
+            # Fees paid in a third asset (e.g. BNB) keep its name and don't change the balances
+            fee_asset = {self.base_asset: 'BASE', self.quote_asset: 'QUOTE'}.get(row.get('commissionAsset'),
+                                                                                row.get('commissionAsset'))
+            fill = Fill(order.id, order.side, price, quantity, float(row['commission']), fee_asset,
+                        'maker' if row.get('maker') else 'taker')
+            _record_fill(order, fill)
+            _notify(on_fill, fill)
+        order.status = result.get('status', 'FILLED')
+        _notify(on_done, order)
+
+    def cancel(self, order_id):
+        def cancel_order():
+            try:
+                response = self._session().delete(
+                    f"{self.base_url}/api/v3/order?"
+                    f"{self._signed({'symbol': self.symbol, 'origClientOrderId': f'bot-{order_id}'})}",
+                    headers={'X-MBX-APIKEY': self.api_key}, timeout=self.timeout)
+                response.raise_for_status()
+            except Exception as e:
+                print(f"Error canceling order {order_id}: {e}")
+        self._pool.submit(cancel_order)
+        return True
+
+    def stop(self):
+        self.detach()
+        self._pool.shutdown(wait=False)
+
+
+EXECUTION_KINDS = ('instant', 'paper', 'live')
+
+
+# Executor for an entry point: None for instant fills inside TradingLogic, the paper
+# backend (PAPER_LATENCY, MAKER_FEE, TAKER_FEE) or the live one (BINANCE_API_KEY,
+# BINANCE_API_SECRET, base_url for e.g. a mock_exchange.py server)
+def make_executor(kind, base_url=None):
+    if kind == 'instant':
+        return None
+    if kind == 'paper':
+        return PaperExecution(latency=float(os.environ.get('PAPER_LATENCY', 0.05)),
+                              maker_fee=float(os.environ.get('MAKER_FEE', 0.001)),
+                              taker_fee=float(os.environ.get('TAKER_FEE', 0.001)))
+    if kind == 'live':
+        missing = [name for name in ('BINANCE_API_KEY', 'BINANCE_API_SECRET') if not os.environ.get(name)]
+        if missing:
+            raise ValueError(f"Live execution needs {' and '.join(missing)} in the environment (or .env)")
+        return LiveExecution(os.environ['BINANCE_API_KEY'], os.environ['BINANCE_API_SECRET'],
+                             base_url=base_url or "https://api.binance.com")
+    raise ValueError(f"Unknown execution backend: {kind}")
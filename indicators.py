@@ -0,0 +1,179 @@
+import math
+
+
+# Fixed-size circular buffer, push returns the value that fell out of the window
+class RingBuffer:
+    def __init__(self, size):
+        if size <= 0:
+            raise ValueError("RingBuffer size must be positive")
+        self.size = size
+        self._values = [0.0] * size
+        self._index = 0
+        self.count = 0
+
+    def push(self, value):
+        evicted = self._values[self._index] if self.count == self.size else None
+        self._values[self._index] = value
+        self._index = (self._index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        return evicted
+
+    def is_full(self):
+        return self.count == self.size
+
+    def last(self):
+        if self.count == 0:
+            return None
+        return self._values[self._index - 1]
+
+    # Values in insertion order, oldest first
+    def values(self):
+        if self.count < self.size:
+            return self._values[:self.count]
+        return self._values[self._index:] + self._values[:self._index]
+
+
+# Running sum with Kahan compensation so long sessions don't accumulate drift
+class _RunningSum:
+    def __init__(self):
+        self.total = 0.0
+        self._compensation = 0.0
+
+    def add(self, value):
+        y = value - self._compensation
+        t = self.total + y
+        self._compensation = (t - self.total) - y
+        self.total = t
+
+
+# Simple moving average, matches pandas rolling(window).mean()
+class SMA:
+    def __init__(self, window):
+        self.window = window
+        self._buffer = RingBuffer(window)
+        self._sum = _RunningSum()
+
+    def update(self, value):
+        evicted = self._buffer.push(value)
+        self._sum.add(value)
+        if evicted is not None:
+            self._sum.add(-evicted)
+        return self.value
+
+    @property
+    def value(self):
+        if not self._buffer.is_full():
+            return None
+        return self._sum.total / self.window
+
+
+# Rolling sample standard deviation, matches pandas rolling(window).std().
+# Uses Welford's update for a sliding window to avoid sum-of-squares cancellation.
+class RollingStd:
+    def __init__(self, window):
+        if window < 2:
+            raise ValueError("RollingStd window must be at least 2")
+        self.window = window
+        self._buffer = RingBuffer(window)
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, value):
+        evicted = self._buffer.push(value)
+        if evicted is None:
+            delta = value - self._mean
+            self._mean += delta / self._buffer.count
+            self._m2 += delta * (value - self._mean)
+        else:
+            old_mean = self._mean
+            self._mean += (value - evicted) / self.window
+            self._m2 += (value - evicted) * (value - self._mean + evicted - old_mean)
+        return self.value
+
+    @property
+    def value(self):
+        if not self._buffer.is_full():
+            return None
+        return math.sqrt(max(self._m2 / (self.window - 1), 0.0))
+
+
+# Exponential moving average, matches pandas ewm(span=span, adjust=False).mean()
+class EMA:
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2 / (span + 1)
+        self.count = 0
+        self._value = None
+
+    def update(self, value):
+        if self._value is None:
+            self._value = value
+        else:
+            self._value += self.alpha * (value - self._value)
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        if self.count < self.span:
+            return None
+        return self._value
+
+
+# Relative strength index with Wilder smoothing
+class RSI:
+    def __init__(self, period=14):
+        self.period = period
+        self._previous = None
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self.count = 0  # number of price changes seen
+
+    def update(self, value):
+        if self._previous is not None:
+            change = value - self._previous
+            gain = change if change > 0 else 0.0
+            loss = -change if change < 0 else 0.0
+            self.count += 1
+            if self.count <= self.period:
+                # Seed with a plain average of the first `period` changes
+                self._avg_gain += gain / self.period
+                self._avg_loss += loss / self.period
+            else:
+                self._avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+                self._avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+        self._previous = value
+        return self.value
+
+    @property
+    def value(self):
+        if self.count < self.period:
+            return None
+        if self._avg_loss == 0:
+            return 100.0
+        rs = self._avg_gain / self._avg_loss
+        return 100 - 100 / (1 + rs)
+
+
+# Named collection of indicators that are all updated with each price
+class IndicatorSet:
+    def __init__(self, indicators=None):
+        self.indicators = dict(indicators or {})
+
+    def add(self, name, indicator):
+        self.indicators[name] = indicator
+
+    def update(self, price):
+        for indicator in self.indicators.values():
+            indicator.update(price)
+
+    def ready(self, *names):
+        names = names or self.indicators.keys()
+        return all(self.indicators[name].value is not None for name in names)
+
+    def values(self):
+        return {name: indicator.value for name, indicator in self.indicators.items()}
+
+    def __getitem__(self, name):
+        return self.indicators[name].value
@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+
+
+BUCKETS = 64  # power-of-two nanosecond buckets, enough for any duration
+
+
+# Log2-bucketed latency histogram; recording is a couple of integer operations. Stages
+# are recorded from the feed thread and the Tk thread alike, so updates and summaries
+# take a lock (uncontended almost always) to keep count, buckets and total consistent.
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def record(self, nanoseconds):
+        if nanoseconds < 0:
+            nanoseconds = 0
+        bucket = min(nanoseconds.bit_length(), BUCKETS - 1)
+        with self._lock:
+            self.buckets[bucket] += 1
+            self.count += 1
+            self.total += nanoseconds
+            if nanoseconds > self.max:
+                self.max = nanoseconds
+
+    # Upper bound of the bucket holding the given percentile
+    def percentile(self, fraction):
+        if self.count == 0:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min(1 << bucket, self.max)
+        return self.max
+
+    def summary(self):
+        with self._lock:
+            return self._summary()
+
+    def _summary(self):
+        return {
+            'count': self.count,
+            'mean_us': self.total / self.count / 1000 if self.count else 0,
+            'p50_us': self.percentile(0.5) / 1000,
+            'p99_us': self.percentile(0.99) / 1000,
+            'max_us': self.max / 1000
+        }
+
+
+# Per-stage latency histograms and gauges for the hot path. When disabled every
+# call returns immediately, so the instrumentation can stay in place.
+class LatencyMonitor:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.perf_counter_ns() if self.enabled else 0
+
+    # Record the time since start, a value returned by now()
+    def record(self, stage, start):
+        if not self.enabled:
+            return
+        self._histogram(stage).record(time.perf_counter_ns() - start)
+
+    # Record the delay between an exchange timestamp (ms since epoch) and now
+    def record_lag(self, stage, exchange_time_ms):
+        if not self.enabled:
+            return
+        self._histogram(stage).record(time.time_ns() - exchange_time_ms * 1_000_000)
+
+    def set_gauge(self, name, value):
+        if self.enabled:
+            self.gauges[name] = value
+
+    def _histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram())
+        return histogram
+
+    def snapshot(self):
+        return {
+            'stages': {stage: histogram.summary() for stage, histogram in list(self.histograms.items())},
+            'gauges': dict(self.gauges)
+        }
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.gauges = {}
+
+    # Print a snapshot every `interval` seconds on a background thread
+    def start_log_reporter(self, interval=60):
+        def report():
+            while True:
+                time.sleep(interval)
+                print(format_snapshot(self.snapshot()))
+
+        thread = threading.Thread(target=report, daemon=True)
+        thread.start()
+        return thread
+
+    # Serve the snapshot as JSON on http://host:port/metrics
+    def start_http_server(self, port=9108, host='127.0.0.1'):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        monitor = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = json.dumps(monitor.snapshot()).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def format_snapshot(snapshot):
+    lines = []
+    for stage, stats in sorted(snapshot['stages'].items()):
+        lines.append(f"{stage}: n={stats['count']} p50={stats['p50_us']:.0f}us "
+                     f"p99={stats['p99_us']:.0f}us max={stats['max_us']:.0f}us")
+    for name, value in sorted(snapshot['gauges'].items()):
+        lines.append(f"{name}: {value}")
+    return "\n".join(lines)
+
+
+# Process-wide monitor, enabled with LATENCY_METRICS=1
+monitor = LatencyMonitor(enabled=os.environ.get('LATENCY_METRICS', '0') == '1')
+
+
+# Re-read LATENCY_METRICS (e.g. after a .env file was loaded), then start the HTTP
+# endpoint (METRICS_PORT) and periodic log (LATENCY_LOG_SECONDS) when metrics are enabled
+def start_reporting_from_env():
+    monitor.enabled = monitor.enabled or os.environ.get('LATENCY_METRICS', '0') == '1'
+    if not monitor.enabled:
+        return
+    if os.environ.get('METRICS_PORT'):
+        monitor.start_http_server(int(os.environ['METRICS_PORT']))
+    if os.environ.get('LATENCY_LOG_SECONDS'):
+        monitor.start_log_reporter(float(os.environ['LATENCY_LOG_SECONDS']))
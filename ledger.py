@@ -0,0 +1,229 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    price REAL NOT NULL,
+    decision TEXT NOT NULL,
+    action TEXT NOT NULL,
+    balance REAL NOT NULL,
+    btc_position REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    last_trade_id INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+"""
+
+
+# Append-only record of executed trades plus periodic snapshots of the strategy state,
+# stored in SQLite (WAL mode). Writes are queued and committed in batches by a
+# background thread, so the tick path only pays for a queue put.
+class Ledger:
+    def __init__(self, path='trading_ledger.db', batch_interval=0.5, batch_size=500, snapshot_interval=10,
+                 max_window_age=3600, keep_snapshots=10):
+        self.path = path
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        self.snapshot_interval = snapshot_interval
+        self.max_window_age = max_window_age  # older price windows are not restored
+        self.keep_snapshots = keep_snapshots
+        self.written = 0
+
+        self._queue = queue.Queue()
+        self._last_snapshot = 0.0
+        self._logic = None
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    # Queue a 'trade' event from the engine
+    def append_trade(self, event):
+        self._queue.put(('trade', (event['time'].timestamp(), event['price'], event['decision'], event['action'],
+                                   event['balance'], event['btc_position'])))
+
+    # Queue a TradingLogic.snapshot(); it covers every trade queued before it
+    def write_snapshot(self, state):
+        self._queue.put(('snapshot', (time.time(), state)))
+
+    # Block until everything queued so far is committed
+    def flush(self, timeout=None):
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        return done.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    # Persist the trades and state of a TradingLogic that publishes on the given bus.
+    # Snapshots are taken on the publishing thread, which is the one that owns the state.
+    def attach(self, bus, logic):
+        self._logic = logic
+        bus.subscribe('tick', self._on_tick)
+        bus.subscribe('trade', self._on_trade)
+
+    def _on_tick(self, event):
+        now = time.monotonic()
+        if now - self._last_snapshot >= self.snapshot_interval:
+            self._last_snapshot = now
+            self.write_snapshot(self._logic.snapshot())
+
+    def _on_trade(self, event):
+        self.append_trade(event)
+        self._last_snapshot = time.monotonic()
+        self.write_snapshot(self._logic.snapshot())
+
+    # Latest snapshot as (state, unix time, id of the last trade it includes), or None
+    def latest_snapshot(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            row = connection.execute(
+                'SELECT state, time, last_trade_id FROM snapshots ORDER BY id DESC LIMIT 1').fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    # Trades after the given id as 'trade' events, oldest first
+    def trades_after(self, trade_id=0):
+        return self._query_trades('SELECT time, price, decision, action, balance, btc_position FROM trades '
+                                  'WHERE id > ? ORDER BY id', (trade_id,))
+
+    # The most recent trades as 'trade' events, oldest first
+    def recent_trades(self, limit=500):
+        return self._query_trades('SELECT * FROM (SELECT id, time, price, decision, action, balance, btc_position '
+                                  'FROM trades ORDER BY id DESC LIMIT ?) ORDER BY id', (limit,), skip=1)
+
+    def _query_trades(self, sql, params, skip=0):
+        connection = sqlite3.connect(self.path)
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+        return [{
+            'time': datetime.fromtimestamp(row[skip]).astimezone(),
+            'price': row[skip + 1],
+            'decision': row[skip + 2],
+            'action': row[skip + 3],
+            'balance': row[skip + 4],
+            'btc_position': row[skip + 5]
+        } for row in rows]
+
+    # Bring a TradingLogic back to where it stopped: the last snapshot, then the portfolio
+    # after the last trade logged since. Returns True if there was anything to restore.
+    def restore(self, logic):
+        latest = self.latest_snapshot()
+        state, snapshot_time, last_trade_id = latest if latest else (None, 0.0, 0)
+        tail = self.trades_after(last_trade_id)
+        if state is None and not tail:
+            return False
+
+        state = dict(state or logic.snapshot())
+        if time.time() - snapshot_time > self.max_window_age:
+            state['price_data'] = []
+        if tail:
+            state.update(balance=tail[-1]['balance'], btc_position=tail[-1]['btc_position'],
+                         last_trade=tail[-1]['action'])
+        logic.restore(state)
+        return True
+
+    @staticmethod
+    def _last_trade_id(connection):
+        return connection.execute('SELECT COALESCE(MAX(id), 0) FROM trades').fetchone()[0]
+
+    # A snapshot as (time, JSON text), or None for a state json can't encode
+    @staticmethod
+    def _encode_snapshot(value):
+        snapshot_time, state = value
+        try:
+            return snapshot_time, json.dumps(state)
+        except (TypeError, ValueError) as e:
+            print(f"Skipping ledger snapshot: {e}")
+            return None
+
+    # Insert the rows of a batch in one transaction; returns the id of the last trade written
+    def _write(self, connection, rows, last_trade_id):
+        for kind, value in rows:
+            if kind == 'trade':
+                last_trade_id = connection.execute(
+                    'INSERT INTO trades (time, price, decision, action, balance, btc_position) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', value).lastrowid
+            else:
+                snapshot_time, state = value
+                snapshot_id = connection.execute(
+                    'INSERT INTO snapshots (time, last_trade_id, state) VALUES (?, ?, ?)',
+                    (snapshot_time, last_trade_id, state)).lastrowid
+                # Only the latest snapshots are needed; the trades are kept forever
+                connection.execute('DELETE FROM snapshots WHERE id <= ?', (snapshot_id - self.keep_snapshots,))
+        connection.commit()
+        return last_trade_id
+
+    def _run(self):
+        connection = self._connect()
+        last_trade_id = self._last_trade_id(connection)
+        pending = []  # rows of a batch that failed to commit, retried with the next batch
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.batch_size and batch[-1] is not None and batch[-1][0] != 'flush':
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            # Snapshots are encoded up front, so a state json can't encode only drops itself
+            rows, pending, flushed = pending, [], []
+            for item in batch:
+                if item is None:
+                    running = False
+                    break
+                kind, value = item
+                if kind == 'flush':
+                    flushed.append(value)
+                elif kind == 'snapshot':
+                    value = self._encode_snapshot(value)
+                    if value is not None:
+                        rows.append((kind, value))
+                else:
+                    rows.append(item)
+
+            try:
+                last_trade_id = self._write(connection, rows, last_trade_id)
+                self.written += len(rows)
+            except sqlite3.Error as e:
+                connection.rollback()
+                last_trade_id = self._last_trade_id(connection)
+                if running:
+                    print(f"Error writing ledger, retrying {len(rows)} rows with the next batch: {e}")
+                    pending = rows
+                else:
+                    print(f"Error writing ledger, {len(rows)} rows lost: {e}")
+            for done in flushed:
+                done.set()
+        connection.close()
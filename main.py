@@ -1,16 +1,16 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk
-import threading
-import websocket
-import json
-import time
-import pandas as pd
-from candlestick_chart import CandlestickChart  
-from trading_logic import TradingLogic  
+from trading_logic import TradingLogic
+from engine import TradingEngine, add_runtime_arguments, build_runtime
+from event_bus import EventBus
+from latency import monitor, start_reporting_from_env, format_snapshot
+from render_pipeline import RenderPipeline
+from trade_history import TradeHistoryView
 
 
 class CryptoTradingBotGUI:
-    def __init__(self, root):
+    def __init__(self, root, fps=10, market_data=None, record_directory=None, ledger=None, bars=None, executor=None):
         self.root = root
         self.root.title("Crypto Trading Bot")
         self.root.geometry("900x900")  
@@ -23,22 +23,48 @@ class CryptoTradingBotGUI:
         self.candlestick_chart = None
 
       
-        self.logic = TradingLogic()  
+        self.logic = TradingLogic(executor=executor)
         self.root.initialbalance = self.logic.simulated_balance
 
-        self.ws = None
-        self.trading_active = False
+        # The engine runs the trading loop; the GUI only subscribes to its events
+        self.bus = EventBus()
+        # One connection for the trade and kline streams; its loop thread is the only
+        # writer of trading state and hands events to Tk through the render pipeline
+        if market_data is None:
+            from async_runtime import AsyncMarketData
+            market_data = AsyncMarketData()
+        self.market_data = market_data
+        self.ledger = ledger
+        self.engine = TradingEngine(self.logic, self.bus, market_data=self.market_data, ledger=ledger, bars=bars)
+
+        self.recorder = None
+        if record_directory:
+            from tick_store import TickRecorder
+            self.recorder = TickRecorder(record_directory)
+            self.recorder.attach(self.market_data, self.engine.recorded_streams())
+
+        # Events arrive on the feed thread and are drawn from the Tk mainloop at a fixed rate
+        self.render_pipeline = RenderPipeline(self.root, self.on_tick, self.on_trades, fps=fps, on_bar=self.on_bar)
+        self.bus.subscribe('tick', self.render_pipeline.push_tick)
+        self.bus.subscribe('bar', self.render_pipeline.push_bar)
+        self.bus.subscribe('trade', self.render_pipeline.push_trade)
 
         self.create_styles()
 
         # Create GUI elements
         self.create_widgets()
 
-
-        self.logic.fetch_fear_greed_index()
+        # Trade history from before the restart
+        if self.ledger:
+            self.load_trade_history()
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+        self.render_pipeline.start()
+
+        if monitor.enabled:
+            self.update_latency_overlay()
+
     def create_styles(self):
         self.style = ttk.Style()
 
@@ -87,29 +113,17 @@ class CryptoTradingBotGUI:
         table_frame = ttk.Frame(self.root, padding="10")
         table_frame.pack(side=tk.TOP, pady=10, fill=tk.BOTH, expand=True)
 
-        self.tree = ttk.Treeview(table_frame, columns=("Time", "Price", "Action", "Balance (USD)", "BTC Position"),
-                                 show='headings', height=10, style="Treeview")
-
-        self.tree.heading("Time", text="Time", anchor=tk.CENTER)
-        self.tree.heading("Price", text="Price (USDT)", anchor=tk.CENTER)
-        self.tree.heading("Action", text="Action", anchor=tk.CENTER)
-        self.tree.heading("Balance (USD)", text="Balance (USD)", anchor=tk.CENTER)
-        self.tree.heading("BTC Position", text="BTC Position", anchor=tk.CENTER)
-
-        self.tree.column("Time", width=120, anchor=tk.CENTER)
-        self.tree.column("Price", width=120, anchor=tk.CENTER)
-        self.tree.column("Action", width=150, anchor=tk.CENTER)
-        self.tree.column("Balance (USD)", width=120, anchor=tk.CENTER)
-        self.tree.column("BTC Position", width=120, anchor=tk.CENTER)
-
-        tree_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=tree_scroll.set)
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        # Bounded, paged view over the full trade history of the session
+        self.trade_history = TradeHistoryView(table_frame)
 
         control_frame = ttk.Frame(self.root, padding="10")
         control_frame.pack(side=tk.BOTTOM, pady=10)
 
+        # Debug overlay, only shown when latency metrics are enabled
+        self.latency_label = ttk.Label(self.root, text="", foreground="gray", font=("Courier", 10), justify=tk.LEFT)
+        if monitor.enabled:
+            self.latency_label.pack(side=tk.BOTTOM, pady=5)
+
         self.start_button = ttk.Button(control_frame, text="Start", command=self.start_trading_and_candlestick)
         self.start_button.pack(side=tk.LEFT, padx=5)
 
@@ -119,98 +133,77 @@ class CryptoTradingBotGUI:
     def start_trading_and_candlestick(self):
         self.start_trading()
         self.open_candlestick_window()
+        self.market_data.start()
 
     def stop_trading_and_candlestick(self):
         self.stop_trading()
         if self.candlestick_chart:
             self.candlestick_chart.stop_stream()
+        self.market_data.stop()
 
     def open_candlestick_window(self):
+        # matplotlib is only loaded once the chart is opened
+        from candlestick_chart import CandlestickChart
+
         candlestick_window = tk.Toplevel(self.root)
         candlestick_window.title("Candlestick Chart")
         candlestick_window.geometry("800x600")
 
-        self.candlestick_chart = CandlestickChart(candlestick_window)
+        # Time bars replace the exchange's 1m klines, so the chart shows what the strategy sees
+        bars = self.engine.bars
+        time_bars = bars is not None and bars.kind == 'time'
+        self.candlestick_chart = CandlestickChart(candlestick_window, candle_seconds=bars.size if time_bars else 60)
 
         chart_frame = ttk.Frame(candlestick_window, padding="10", style="TFrame")
         chart_frame.pack(side=tk.TOP, pady=10, fill=tk.BOTH, expand=True)
 
         self.candlestick_chart.create_chart_frame(chart_frame)
 
-        self.candlestick_chart.start_candlestick_stream()
+        if time_bars:
+            self.candlestick_chart.start_bar_stream(self.bus)
+        else:
+            self.candlestick_chart.start_candlestick_stream(self.market_data)
 
     def start_trading(self):
-        if not self.trading_active:
-            self.trading_active = True
-            print("Trading started")
-
-            self.socket_thread = threading.Thread(target=self.start_websocket)
-            self.socket_thread.start()
+        self.engine.start()
 
     def stop_trading(self):
-        if self.trading_active:
-            self.trading_active = False
-            print("Trading stopped")
-
-            if self.ws:
-                self.ws.close()
-
-    def start_websocket(self):
-        socket = "wss://stream.binance.com:9443/ws/btcusdt@trade"
-
-        def on_message(ws, message):
-            try:
-                if not self.trading_active:
-                    ws.close()
-                    return
-
-                data = json.loads(message)
-                price = float(data['p'])  
-                self.logic.update_price_data(price)
-
-                decision, reason, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score = self.logic.apply_trading_logic()
-
-                self.update_gui(price, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score)
-
-                if decision != "Hold":
-                    current_time = pd.Timestamp.now() 
-                    action = self.logic.get_state()['last_trade']
-                    usd_balance = f"${self.logic.get_state()['balance']:.2f}"
-                    btc_position = f"{self.logic.get_state()['btc_position']:.6f} BTC"
-
-                    row_color = "green" if "Buy" in action else "red"
-                    self.tree.insert('', 'end', values=(current_time.strftime('%H:%M:%S'), f"${price:.2f}", action, usd_balance, btc_position), tags=(row_color,))
-                    self.tree.tag_configure("green", foreground="green")
-                    self.tree.tag_configure("red", foreground="red")
-
-                    self.tree.yview_moveto(1)
-
-                    if self.candlestick_chart:
-                        self.candlestick_chart.mark_trade_action(price, action, current_time)
-
-            except KeyError as e:
-                print(f"KeyError: {e}")
-            except ValueError as e:
-                print(f"ValueError: {e}")
-            except Exception as e:
-                print(f"Unexpected WebSocket Error: {e}")
-        def on_error(ws, error):
-            print(f"WebSocket Error: {error}")
-
-        def on_close(ws):
-            print("WebSocket closed")
-
-        def on_open(ws):
-            print("WebSocket connection opened")
+        self.engine.stop()
+
+    def on_tick(self, event):
+        start = monitor.now()
+        self.update_gui(event['price'], event['sma_score'], event['fear_greed_score'], event['sentiment_score'],
+                        event['buy_score'], event['sell_score'], event['state'])
+        monitor.record('update_gui', start)
+
+    # Between strategy evaluations the price comes from the bar in progress
+    def on_bar(self, event):
+        self.btc_price_label.config(text=f"BTC Price: ${float(event['k']['c']):.2f}")
+
+    def update_latency_overlay(self):
+        stats = self.render_pipeline.stats()
+        self.latency_label.config(text=f"{format_snapshot(monitor.snapshot())}\n"
+                                       f"render: frames={stats['frames']} coalesced={stats['coalesced']} "
+                                       f"queued={stats['queued']}")
+        self.root.after(1000, self.update_latency_overlay)
+
+    # Add all trades from one frame to the history, then mark them on the chart
+    def on_trades(self, events):
+        self.trade_history.add(events)
+        if self.candlestick_chart:
+            for event in events:
+                self.candlestick_chart.mark_trade_action(event['price'], event['decision'], event['time'])
 
-        self.ws = websocket.WebSocketApp(socket, on_message=on_message, on_error=on_error, on_close=on_close)
-        self.ws.on_open = on_open
-        self.ws.run_forever()
+    def load_trade_history(self, limit=100_000):
+        trades = self.ledger.recent_trades(limit)
+        if trades:
+            self.on_trades(trades)
+            self.usd_balance_label.config(text=f"USD Balance: ${self.logic.simulated_balance:.2f}")
 
-    def update_gui(self, price, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score):
+    def update_gui(self, price, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score, state=None):
         self.btc_price_label.config(text=f"BTC Price: ${price:.2f}")
 
-        state = self.logic.get_state()
+        state = state or self.logic.get_state()
         self.usd_balance_label.config(text=f"USD Balance: ${state['balance']:.2f}")
 
         total_value = state['balance'] + (state['btc_position'] * price)
@@ -235,11 +228,26 @@ class CryptoTradingBotGUI:
         self.sell_score_label.config(text=f"Total Sell Score: {sell_score:.2f}")
         
     def on_closing(self):
+        self.render_pipeline.stop()
         self.stop_trading_and_candlestick()
+        if self.recorder:
+            self.recorder.close()
+        if self.ledger:
+            self.ledger.close()
+        if self.logic.executor:
+            self.logic.executor.stop()
         self.root.destroy()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crypto trading bot GUI")
+    add_runtime_arguments(parser)
+    args = parser.parse_args()
+
+    start_reporting_from_env()
+    executor, market_data, ledger, bars = build_runtime(args, parser)
+
     root = tk.Tk()
-    app = CryptoTradingBotGUI(root)
+    app = CryptoTradingBotGUI(root, market_data=market_data, record_directory=args.record, ledger=ledger, bars=bars,
+                              executor=executor)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,168 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+
+
+FEAR_GREED_URL = 'https://api.alternative.me/fng/'
+
+
+# Pooled HTTP session with retries, shared by the context providers
+def make_session(retries=3, pool_size=4):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Fear & Greed index kept fresh in the background. The latest reading is persisted
+# to disk so a restart within the TTL doesn't need the API, and get() never blocks.
+class FearGreedProvider:
+    def __init__(self, cache_path='fear_greed_cache.json', ttl=3600, timeout=10, min_refresh=60,
+                 retry_delay=30, session=None, url=FEAR_GREED_URL):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.timeout = timeout
+        self.min_refresh = min_refresh
+        self.retry_delay = retry_delay
+        self.session = session  # created on the first request
+        self.url = url
+
+        # (index, classification, index timestamp, fetched at, seconds until the next update)
+        self._reading = (None, None, None, 0.0, None)
+        self.history = []  # [(unix timestamp, index)], oldest first
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.load_cache()
+
+    def _session(self):
+        if self.session is None:
+            self.session = make_session()
+        return self.session
+
+    def get(self):
+        index, classification = self._reading[:2]
+        return index, classification
+
+    @property
+    def index(self):
+        return self._reading[0]
+
+    @property
+    def classification(self):
+        return self._reading[1]
+
+    def age(self):
+        return time.time() - self._reading[3]
+
+    def is_fresh(self):
+        return self._reading[0] is not None and self.age() < self.ttl
+
+    # Seconds until the API publishes a new value, as far as we know
+    def seconds_until_update(self):
+        _, _, _, fetched_at, time_until_update = self._reading
+        if time_until_update is None:
+            return self.ttl - self.age()
+        return fetched_at + time_until_update - time.time()
+
+    def refresh(self):
+        response = self._session().get(self.url, params={'limit': 1}, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()['data'][0]
+
+        until_update = data.get('time_until_update')
+        self._reading = (
+            int(data['value']),
+            data['value_classification'],
+            int(data['timestamp']),
+            time.time(),
+            int(until_update) if until_update is not None else None
+        )
+        self.save_cache()
+        return self.get()
+
+    def load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+            self._reading = (cached['value'], cached['classification'], cached['timestamp'],
+                             cached['fetched_at'], cached.get('time_until_update'))
+        except (ValueError, KeyError, OSError) as e:
+            print(f"Ignoring Fear and Greed cache: {e}")
+
+    def save_cache(self):
+        if not self.cache_path:
+            return
+        index, classification, timestamp, fetched_at, time_until_update = self._reading
+        temporary_path = self.cache_path + '.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump({'value': index, 'classification': classification, 'timestamp': timestamp,
+                       'fetched_at': fetched_at, 'time_until_update': time_until_update}, f)
+        os.replace(temporary_path, self.cache_path)
+
+    # Full daily history, oldest first, for backtests
+    def fetch_history(self, limit=0):
+        response = self._session().get(self.url, params={'limit': limit, 'format': 'json'}, timeout=self.timeout)
+        response.raise_for_status()
+        self.history = sorted((int(row['timestamp']), int(row['value'])) for row in response.json()['data'])
+        return self.history
+
+    # Write the history as time,value rows, the format backtest.load_series reads
+    def save_history_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['time', 'value'])
+            for timestamp, value in self.history:
+                writer.writerow([timestamp * 1000, value])
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    # Refresh if a new value is due and return the seconds until the next check
+    def run_once(self):
+        if self.is_fresh() and self.seconds_until_update() > 0:
+            return max(self.seconds_until_update(), self.min_refresh)
+        try:
+            self.refresh()
+            return max(self.seconds_until_update(), self.min_refresh)
+        except Exception as e:
+            print(f"Error fetching Fear and Greed Index: {e}")
+            return self.retry_delay
+
+    def _run(self, stop_event):
+        while not stop_event.is_set():
+            stop_event.wait(self.run_once())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the Fear & Greed index history for backtests")
+    parser.add_argument('out', help="CSV file to write time,value rows to")
+    parser.add_argument('--limit', type=int, default=0, help="Number of days, 0 for all")
+    args = parser.parse_args()
+
+    provider = FearGreedProvider(cache_path=None)
+    provider.fetch_history(args.limit)
+    provider.save_history_csv(args.out)
+    print(f"Wrote {len(provider.history)} days to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import json
+import threading
+import time
+
+from decoders import decode_message
+from latency import monitor
+
+
+BINANCE_WS_URL = "wss://stream.binance.com:9443"
+BINANCE_REST_URL = "https://api.binance.com"
+
+
+# Build a kline stream payload from a row of the REST /api/v3/klines response
+def kline_from_rest(symbol, interval, row, now_ms):
+    return {
+        'e': 'kline',
+        'E': now_ms,
+        's': symbol.upper(),
+        'k': {
+            't': row[0], 'T': row[6], 's': symbol.upper(), 'i': interval,
+            'o': row[1], 'h': row[2], 'l': row[3], 'c': row[4], 'v': row[5],
+            'x': row[6] < now_ms
+        },
+        'backfill': True
+    }
+
+
+INTERVAL_MS = {'s': 1000, 'm': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+
+
+# Where to backfill each subscribed kline stream from: the latest kline seen on it or,
+# for a stream that had no kline yet, the interval holding the latest message of any stream
+def backfill_starts(streams, last_kline_open, last_event_ms):
+    starts = []
+    for stream in streams:
+        _, _, interval = stream.partition('@kline_')
+        if not interval:
+            continue
+        if stream in last_kline_open:
+            starts.append((stream, last_kline_open[stream]))
+        elif last_event_ms is not None:
+            size = int(interval[:-1] or 1) * INTERVAL_MS.get(interval[-1], 1)
+            starts.append((stream, last_event_ms - last_event_ms % size))
+    return starts
+
+
+# Kline payloads of a kline stream from last_open onwards, fetched from REST (blocking).
+# Returns an empty list for streams that aren't kline streams.
+def fetch_missed_klines(rest_url, stream, last_open):
+    symbol, _, interval = stream.partition('@kline_')
+    if not interval:
+        return []
+    import requests
+    response = requests.get(f"{rest_url}/api/v3/klines", timeout=10, params={
+        'symbol': symbol.upper(), 'interval': interval, 'startTime': last_open, 'limit': 1000
+    })
+    response.raise_for_status()
+    now_ms = int(time.time() * 1000)
+    return [kline_from_rest(symbol, interval, row, now_ms) for row in response.json()]
+
+
+# Subscriber registry and message bookkeeping shared by MarketDataClient and
+# AsyncMarketData. Subclasses own the transport: they connect to _url(streams()),
+# feed every raw message through _decode and hand it to _dispatch, and send
+# SUBSCRIBE / UNSUBSCRIBE requests from _request_streams.
+class BaseMarketData:
+    def __init__(self, ws_url=BINANCE_WS_URL, rest_url=BINANCE_REST_URL, min_backoff=1, max_backoff=60,
+                 heartbeat_timeout=30, ping_interval=20, ping_timeout=10):
+        self.ws_url = ws_url.rstrip('/')
+        self.rest_url = rest_url.rstrip('/')
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.heartbeat_timeout = heartbeat_timeout
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+
+        self.running = False
+        self.connected = False
+        self.reconnects = 0
+        self.delivered = 0
+
+        self._subscribers = {}  # stream -> [callback]
+        self._lock = threading.Lock()
+        self._last_message = 0.0
+        self._last_kline_open = {}  # kline stream -> open time of the latest kline seen
+        self._last_event_ms = None  # exchange time of the latest message on any stream
+        self._request_id = 0
+
+    def subscribe(self, stream, callback):
+        with self._lock:
+            callbacks = self._subscribers.setdefault(stream, [])
+            is_new = not callbacks
+            callbacks.append(callback)
+        if is_new:
+            self._request_streams("SUBSCRIBE", [stream])
+        return callback
+
+    def unsubscribe(self, stream, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(stream, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            is_empty = not callbacks
+            if is_empty:
+                self._subscribers.pop(stream, None)
+        if is_empty:
+            self._request_streams("UNSUBSCRIBE", [stream])
+
+    def streams(self):
+        with self._lock:
+            return list(self._subscribers)
+
+    # Send a SUBSCRIBE / UNSUBSCRIBE request on the open connection, if there is one;
+    # streams changed while disconnected are picked up from streams() on the next connect
+    def _request_streams(self, method, streams):
+        raise NotImplementedError
+
+    def _url(self, streams):
+        return f"{self.ws_url}/stream?streams={'/'.join(streams)}"
+
+    # Streams subscribed while a connection to `url_streams` was being made
+    def _missing_streams(self, url_streams):
+        return [stream for stream in self.streams() if stream not in url_streams]
+
+    def _next_request_id(self):
+        self._request_id += 1
+        return self._request_id
+
+    # Decode a raw message and note its exchange time and kline; (None, None) for replies
+    # to SUBSCRIBE / UNSUBSCRIBE
+    def _decode(self, message):
+        start = monitor.now()
+        stream, data = decode_message(message)
+        monitor.record('json_decode', start)
+        if stream is None:
+            return None, None
+        if 'E' in data:
+            self._last_event_ms = data['E']
+            monitor.record_lag('exchange_to_receive', data['E'])
+        if 'k' in data:
+            self._last_kline_open[stream] = data['k']['t']
+        return stream, data
+
+    def _dispatch(self, stream, data):
+        with self._lock:
+            callbacks = list(self._subscribers.get(stream, ()))
+        for callback in callbacks:
+            try:
+                callback(data)
+            except Exception as e:
+                print(f"Error in {stream} subscriber: {e}")
+        self.delivered += 1
+
+    # (stream, open time) of every kline stream to backfill after a reconnect
+    def _backfill_starts(self):
+        return backfill_starts(self.streams(), self._last_kline_open, self._last_event_ms)
+
+    def _note_backfilled(self, stream, data):
+        self._last_kline_open[stream] = max(self._last_kline_open.get(stream, 0), data['k']['t'])
+
+    # Seconds to wait before reconnecting, and the backoff for the attempt after that. The
+    # backoff starts over if the dropped connection was healthy for a while.
+    def _reconnect_delay(self, backoff, connected_at):
+        if connected_at and time.monotonic() - connected_at > self.max_backoff:
+            backoff = self.min_backoff
+        print(f"Market data connection lost, reconnecting in {backoff}s")
+        self.reconnects += 1
+        return backoff, min(backoff * 2, self.max_backoff)
+
+
+# One combined-stream Binance connection shared by every feed in the app.
+# Messages are fanned out to the callbacks registered for each stream, the
+# connection is re-established with exponential backoff when it drops or goes
+# quiet, and kline streams are backfilled from REST after a reconnect.
+class MarketDataClient(BaseMarketData):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.ws = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._watchdog = None
+        self._connected_at = None
+        self._url_streams = set()
+        self._has_connected = False
+
+    def _request_streams(self, method, streams):
+        if self.connected:
+            self._send_method(method, streams)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._watchdog = threading.Thread(target=self._watch_heartbeat, daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        if self.ws:
+            self.ws.close()
+
+    def _run(self):
+        backoff = self.min_backoff
+        while self.running:
+            streams = self.streams()
+            if not streams:
+                self._stop_event.wait(0.5)
+                continue
+
+            self._connected_at = None
+            self._url_streams = set(streams)
+            import websocket
+            self.ws = websocket.WebSocketApp(self._url(streams), on_open=self._on_open, on_message=self._on_message,
+                                             on_error=self._on_error, on_close=self._on_close, on_pong=self._on_pong)
+            self._last_message = time.monotonic()
+            self.ws.run_forever(ping_interval=self.ping_interval, ping_timeout=self.ping_timeout)
+            self.connected = False
+
+            if not self.running:
+                break
+            delay, backoff = self._reconnect_delay(backoff, self._connected_at)
+            self._stop_event.wait(delay)
+
+    # Force a reconnect when no message (data or pong) has arrived for heartbeat_timeout seconds
+    def _watch_heartbeat(self):
+        while not self._stop_event.wait(1):
+            if self.connected and time.monotonic() - self._last_message > self.heartbeat_timeout:
+                print("Market data heartbeat timed out")
+                self.ws.close()
+
+    def _on_open(self, ws):
+        print("WebSocket connection opened")
+        self.connected = True
+        self._connected_at = time.monotonic()
+        self._last_message = time.monotonic()
+
+        # Streams subscribed while the connection was being made
+        missing = self._missing_streams(self._url_streams)
+        if missing:
+            self._send_method("SUBSCRIBE", missing)
+
+        # Backfill before any live message is handled so subscribers see klines in order
+        if self._has_connected:
+            self.backfill()
+        self._has_connected = True
+
+    def _on_message(self, ws, message):
+        self._last_message = time.monotonic()
+        try:
+            stream, data = self._decode(message)
+            if stream is not None:
+                self._dispatch(stream, data)
+        except Exception as e:
+            print(f"Market data error: {e}")
+
+    # Replies to the client's pings keep a quiet but healthy connection alive
+    def _on_pong(self, ws, data):
+        self._last_message = time.monotonic()
+
+    def _on_error(self, ws, error):
+        print(f"WebSocket Error: {error}")
+
+    def _on_close(self, ws, *args):
+        self.connected = False
+        print("WebSocket closed")
+
+    def _send_method(self, method, streams):
+        try:
+            self.ws.send(json.dumps({"method": method, "params": streams, "id": self._next_request_id()}))
+        except Exception as e:
+            print(f"Error sending {method}: {e}")
+
+    # Replay the klines missed while disconnected, starting with the candle that was open
+    # at the time of the disconnect so it is delivered in its final state
+    def backfill(self):
+        for stream, last_open in self._backfill_starts():
+            try:
+                for data in fetch_missed_klines(self.rest_url, stream, last_open):
+                    self._note_backfilled(stream, data)
+                    self._dispatch(stream, data)
+            except Exception as e:
+                print(f"Error backfilling {stream}: {e}")
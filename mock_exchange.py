@@ -0,0 +1,215 @@
+import argparse
+import hashlib
+import hmac
+import itertools
+import json
+import threading
+from decimal import Decimal, InvalidOperation
+from urllib.parse import parse_qsl, urlsplit
+
+from execution import BUY, OrderBook
+
+
+# Synthetic book of `levels` levels per side around a mid price
+def make_book(mid=30000.0, levels=10, step=1.0, quantity=0.5):
+    book = OrderBook()
+    book.apply_snapshot({
+        'bids': [[mid - step * (i + 1), quantity] for i in range(levels)],
+        'asks': [[mid + step * (i + 1), quantity] for i in range(levels)]
+    })
+    return book
+
+
+# Local stand-in for the Binance order endpoints (POST and DELETE /api/v3/order, and
+# GET /api/v3/exchangeInfo) for exercising LiveExecution. Requests must carry the API key
+# and a valid HMAC-SHA256 signature, and orders must pass the symbol's LOT_SIZE,
+# PRICE_FILTER and NOTIONAL filters and quote precision, or they are rejected with -1013
+# like on Binance. Market orders fill against an in-memory OrderBook, limit orders fill
+# as far as their price allows and rest with the remainder.
+class MockExchange:
+    def __init__(self, api_key='test-key', api_secret='test-secret', book=None, fee=0.001, base_asset='BTC',
+                 quote_asset='USDT', host='127.0.0.1', port=0, step_size='0.00001000', min_qty='0.00001000',
+                 tick_size='0.01000000', min_notional='5.00000000', quote_precision=8):
+        self.api_key = api_key
+        self.api_secret = api_secret.encode()
+        self.book = book or make_book()
+        self.fee = fee
+        self.base_asset = base_asset
+        self.quote_asset = quote_asset
+        self.step_size = Decimal(step_size)
+        self.min_qty = Decimal(min_qty)
+        self.tick_size = Decimal(tick_size)
+        self.min_notional = Decimal(min_notional)
+        self.quote_precision = quote_precision
+        self.host = host
+        self.port = port
+        self.orders = {}  # client order id -> response
+        self.requests = 0
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        exchange = self
+
+        class OrderHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if urlsplit(self.path).path != '/api/v3/exchangeInfo':
+                    return self._respond(404, {'code': -1100, 'msg': 'Unknown endpoint.'})
+                self._respond(200, exchange.exchange_info())
+
+            def do_POST(self):
+                self._respond(*exchange.handle('POST', self.path, self.headers.get('X-MBX-APIKEY')))
+
+            def do_DELETE(self):
+                self._respond(*exchange.handle('DELETE', self.path, self.headers.get('X-MBX-APIKEY')))
+
+            def _respond(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), OrderHandler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def symbol(self):
+        return self.base_asset + self.quote_asset
+
+    def exchange_info(self):
+        return {'symbols': [{
+            'symbol': self.symbol, 'baseAsset': self.base_asset, 'quoteAsset': self.quote_asset,
+            'quoteAssetPrecision': self.quote_precision,
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'minPrice': str(self.tick_size), 'maxPrice': '1000000.00000000',
+                 'tickSize': str(self.tick_size)},
+                {'filterType': 'LOT_SIZE', 'minQty': str(self.min_qty), 'maxQty': '9000.00000000',
+                 'stepSize': str(self.step_size)},
+                {'filterType': 'NOTIONAL', 'minNotional': str(self.min_notional), 'applyMinToMarket': True}
+            ]
+        }]}
+
+    # The Binance filter an order's parameters break, or None
+    def filter_failure(self, params):
+        try:
+            quantity = Decimal(params['quantity']) if 'quantity' in params else None
+            quote = Decimal(params['quoteOrderQty']) if 'quoteOrderQty' in params else None
+            price = Decimal(params['price']) if 'price' in params else None
+        except InvalidOperation:
+            return 'Illegal characters found in parameter.'
+        if price is not None and price % self.tick_size != 0:
+            return 'Filter failure: PRICE_FILTER'
+        if quantity is not None and (quantity < self.min_qty or quantity % self.step_size != 0):
+            return 'Filter failure: LOT_SIZE'
+        if quote is not None and quote != round(quote, self.quote_precision):
+            return 'Filter failure: quote precision'
+        # Market orders are valued at the touch they would trade against
+        if price is None and self.book.best(params['side']) is not None:
+            price = Decimal(repr(self.book.best(params['side'])))
+        notional = quote if quote is not None else quantity * price if price is not None else None
+        if notional is not None and notional < self.min_notional:
+            return 'Filter failure: NOTIONAL'
+        return None
+
+    # Returns (HTTP status, JSON payload)
+    def handle(self, method, path, api_key):
+        self.requests += 1
+        url = urlsplit(path)
+        if url.path != '/api/v3/order':
+            return 404, {'code': -1100, 'msg': 'Unknown endpoint.'}
+        if api_key != self.api_key:
+            return 401, {'code': -2015, 'msg': 'Invalid API-key.'}
+        query, _, signature = url.query.rpartition('&signature=')
+        expected = hmac.new(self.api_secret, query.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(signature, expected):
+            return 400, {'code': -1022, 'msg': 'Signature for this request is not valid.'}
+
+        params = dict(parse_qsl(query))
+        if method == 'DELETE':
+            with self._lock:
+                order = self.orders.get(params.get('origClientOrderId'))
+                if order is None or order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+                    return 400, {'code': -2011, 'msg': 'Unknown order sent.'}
+                order['status'] = 'CANCELED'
+            return 200, order
+        failure = self.filter_failure(params)
+        if failure:
+            return 400, {'code': -1013, 'msg': failure}
+        return 200, self.place(params)
+
+    def place(self, params):
+        side = params['side']
+        quantity = float(params['quantity']) if 'quantity' in params else None
+        quote_quantity = float(params['quoteOrderQty']) if 'quoteOrderQty' in params else None
+        limit_price = float(params['price']) if params.get('type') == 'LIMIT' else None
+
+        with self._lock:
+            levels = self.book.take(side, quantity=quantity, quote_quantity=quote_quantity, limit_price=limit_price)
+            fills = []
+            for price, size in levels:
+                if side == BUY:
+                    commission, asset = size * self.fee, self.base_asset
+                else:
+                    commission, asset = price * size * self.fee, self.quote_asset
+                fills.append({'price': f"{price:.8f}", 'qty': f"{size:.8f}", 'commission': f"{commission:.8f}",
+                              'commissionAsset': asset})
+
+            executed = sum(size for _, size in levels)
+            quote = sum(price * size for price, size in levels)
+            if quote_quantity is not None:
+                complete = quote >= quote_quantity - 1e-6
+            else:
+                complete = executed >= quantity - 1e-12
+            if complete:
+                status = 'FILLED'
+            elif limit_price is not None:
+                status = 'PARTIALLY_FILLED' if levels else 'NEW'
+            else:
+                status = 'EXPIRED'
+            response = {
+                'symbol': params['symbol'], 'orderId': next(self._ids), 'clientOrderId': params.get('newClientOrderId'),
+                'side': side, 'type': params.get('type'), 'status': status, 'executedQty': f"{executed:.8f}",
+                'cummulativeQuoteQty': f"{quote:.8f}", 'fills': fills
+            }
+            self.orders[params.get('newClientOrderId')] = response
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock Binance order endpoint for LiveExecution")
+    parser.add_argument('--port', type=int, default=8700)
+    parser.add_argument('--mid', type=float, default=30000.0, help="Mid price of the synthetic book")
+    parser.add_argument('--api-key', default='test-key')
+    parser.add_argument('--api-secret', default='test-secret')
+    args = parser.parse_args()
+
+    exchange = MockExchange(args.api_key, args.api_secret, book=make_book(args.mid), port=args.port).start()
+    print(f"Mock exchange listening on {exchange.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        exchange.stop()
+
+
+if __name__ == "__main__":
+    main()
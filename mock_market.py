@@ -0,0 +1,185 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+
+# Local stand-in for the Binance market data endpoints, for exercising MarketDataClient and
+# AsyncMarketData without a network: a combined-stream websocket (/stream?streams=...) that
+# answers SUBSCRIBE / UNSUBSCRIBE, and REST /api/v3/klines serving the rows added with
+# add_kline. publish() pushes a message to every connection on the stream and disconnect()
+# drops every connection, so reconnects and backfills can be driven from a test.
+class MockMarket:
+    def __init__(self, host='127.0.0.1', port=0, rest_port=0):
+        self.host = host
+        self.port = port
+        self.rest_port = rest_port
+        self.klines = {}  # (SYMBOL, interval) -> REST rows, sorted by open time
+        self.connections = 0  # connections accepted so far
+        self.kline_requests = 0
+
+        self._clients = {}  # connection -> set of streams
+        self._lock = threading.Lock()
+        self._loop = None
+        self._stopped = None
+        self._thread = None
+        self._http = None
+
+    @property
+    def ws_url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    @property
+    def rest_url(self):
+        return f"http://{self.host}:{self.rest_port}"
+
+    def start(self):
+        ready = threading.Event()
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(ready),), daemon=True)
+        self._thread.start()
+        ready.wait(5)
+        self._start_rest()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+            self._thread.join(5)
+        if self._http:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+
+    # Add a REST kline row: [open time, open, high, low, close, volume, close time]
+    def add_kline(self, symbol, interval, open_time, close_time, open, high, low, close, volume):
+        with self._lock:
+            rows = self.klines.setdefault((symbol.upper(), interval), [])
+            rows.append([open_time, f"{open:.2f}", f"{high:.2f}", f"{low:.2f}", f"{close:.2f}", f"{volume:.5f}",
+                         close_time])
+            rows.sort(key=lambda row: row[0])
+
+    def streams(self):
+        with self._lock:
+            return set().union(*self._clients.values()) if self._clients else set()
+
+    # Send a combined-stream message to every connection subscribed to `stream`
+    def publish(self, stream, data):
+        message = json.dumps({'stream': stream, 'data': data})
+        self._run(self._send_all(stream, message))
+
+    # Drop every open connection without a closing handshake, as a network failure would
+    def disconnect(self):
+        self._run(self._close_all())
+
+    # Block until `count` connections have been accepted in total
+    def wait_for_connections(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if self.connections >= count and self._clients:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def _run(self, coroutine):
+        asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(5)
+
+    async def _serve(self, ready):
+        from websockets.asyncio.server import serve
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        async with serve(self._handle, self.host, self.port) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            await self._stopped.wait()
+
+    async def _handle(self, connection):
+        url = urlsplit(connection.request.path)
+        streams = set(s for s in parse_qs(url.query).get('streams', [''])[0].split('/') if s)
+        with self._lock:
+            self._clients[connection] = streams
+            self.connections += 1
+        try:
+            async for message in connection:
+                request = json.loads(message)
+                with self._lock:
+                    if request.get('method') == 'SUBSCRIBE':
+                        streams.update(request['params'])
+                    elif request.get('method') == 'UNSUBSCRIBE':
+                        streams.difference_update(request['params'])
+                await connection.send(json.dumps({'result': None, 'id': request.get('id')}))
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._clients.pop(connection, None)
+
+    async def _send_all(self, stream, message):
+        with self._lock:
+            connections = [c for c, streams in self._clients.items() if stream in streams]
+        for connection in connections:
+            try:
+                await connection.send(message)
+            except Exception:
+                pass
+
+    async def _close_all(self):
+        with self._lock:
+            connections = list(self._clients)
+        for connection in connections:
+            connection.transport.abort()
+
+    def _start_rest(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        market = self
+
+        class KlineHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path != '/api/v3/klines':
+                    return self._respond(404, {'code': -1100, 'msg': 'Unknown endpoint.'})
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                self._respond(200, market.rest_klines(params))
+
+            def _respond(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._http = ThreadingHTTPServer((self.host, self.rest_port), KlineHandler)
+        self.rest_port = self._http.server_address[1]
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+
+    # Rows of /api/v3/klines for the request parameters (symbol, interval, startTime, limit)
+    def rest_klines(self, params):
+        with self._lock:
+            self.kline_requests += 1
+            rows = self.klines.get((params['symbol'], params['interval']), [])
+            start = int(params.get('startTime', 0))
+            return [row for row in rows if row[0] >= start][:int(params.get('limit', 500))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock Binance market data websocket and kline endpoint")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rest-port', type=int, default=8766)
+    args = parser.parse_args()
+
+    market = MockMarket(port=args.port, rest_port=args.rest_port).start()
+    print(f"Mock market data on {market.ws_url} (REST {market.rest_url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        market.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from market_context import FearGreedProvider
+from market_data import MarketDataClient
+from strategy import StrategyParams
+from trading_logic import load_environment, make_sentiment_engine
+
+
+# Runs the TradingLogic rules for many symbols at once. Per-symbol state lives in
+# NumPy arrays indexed by symbol, price windows are one (symbols x long_window)
+# ring buffer with running SMA sums, and ticks are applied and evaluated with
+# vectorized operations. All symbols share one cash balance and the same
+# sentiment and Fear & Greed readings.
+#
+# process_batch splits a batch into tick rounds: round k holds the k-th tick of
+# every symbol in the batch. Each round is applied and then evaluated, so every
+# tick of a symbol is scored as TradingLogic scores it and SMA crossings inside a
+# batch are not lost. Only the symbols that ticked in a round can trade in it, so a
+# symbol is never traded twice on the same price. Within a round, symbols are
+# evaluated together on their round-k prices rather than in exact arrival order
+# across symbols.
+class PortfolioEngine:
+    def __init__(self, symbols, params=None, initial_balance=10000, max_allocation=0.1,
+                 sentiment=None, fear_greed=None, resync_every=10000):
+        self.params = params or StrategyParams()
+        self.symbols = [symbol.lower() for symbol in symbols]
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        n = len(self.symbols)
+        window = self.params.long_window
+
+        self.initial_balance = float(initial_balance)
+        self.cash = float(initial_balance)
+        self.positions = np.zeros(n)
+        self.last_price = np.full(n, np.nan)
+        # Fraction of total equity a single symbol may be bought with
+        self.max_allocation = np.broadcast_to(np.asarray(max_allocation, dtype=float), (n,)).copy()
+
+        self.window = np.zeros((n, window))
+        self.head = np.zeros(n, dtype=np.int64)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.short_sum = np.zeros(n)
+        self.long_sum = np.zeros(n)
+
+        # Shared market context, read once per evaluation
+        self.sentiment = sentiment or (lambda: 0)
+        self.fear_greed = fear_greed or (lambda: None)
+
+        self.resync_every = resync_every
+        self._batches = 0
+
+    # A symbol can appear several times in a batch; yield one tick per symbol per round,
+    # in arrival order
+    @staticmethod
+    def _rounds(symbol_indices, prices):
+        symbol_indices = np.asarray(symbol_indices, dtype=np.int64)
+        prices = np.asarray(prices, dtype=float)
+        while len(symbol_indices):
+            _, first = np.unique(symbol_indices, return_index=True)
+            yield symbol_indices[first], prices[first]
+            remaining = np.ones(len(symbol_indices), dtype=bool)
+            remaining[first] = False
+            symbol_indices, prices = symbol_indices[remaining], prices[remaining]
+
+    # Apply a batch of ticks given as parallel arrays of symbol indices and prices, without evaluating
+    def update_prices(self, symbol_indices, prices):
+        for idx, round_prices in self._rounds(symbol_indices, prices):
+            self._apply(idx, round_prices)
+        self._batch_done()
+
+    def _batch_done(self):
+        self._batches += 1
+        if self._batches % self.resync_every == 0:
+            self._resync()
+
+    def _apply(self, idx, prices):
+        long_window = self.params.long_window
+        short_window = self.params.short_window
+        head = self.head[idx]
+        count = self.count[idx]
+
+        evicted_long = np.where(count >= long_window, self.window[idx, head], 0.0)
+        evicted_short = np.where(count >= short_window, self.window[idx, (head - short_window) % long_window], 0.0)
+
+        self.window[idx, head] = prices
+        self.long_sum[idx] += prices - evicted_long
+        self.short_sum[idx] += prices - evicted_short
+        self.head[idx] = (head + 1) % long_window
+        self.count[idx] = count + 1
+        self.last_price[idx] = prices
+
+    # Recompute the running sums from the windows to drop accumulated rounding error
+    def _resync(self):
+        long_window = self.params.long_window
+        short_window = self.params.short_window
+        self.long_sum = self.window.sum(axis=1)
+        offsets = (self.head[:, None] - 1 - np.arange(short_window)[None, :]) % long_window
+        short = np.take_along_axis(self.window, offsets, axis=1).sum(axis=1)
+        self.short_sum = np.where(self.count >= short_window, short, self.short_sum)
+
+    def equity(self):
+        return self.cash + np.nansum(self.positions * self.last_price)
+
+    # Score the symbols and execute the resulting trades; returns a list of trade dicts.
+    # With `idx`, only those symbols (the ones that just ticked) can trade.
+    def evaluate(self, idx=None):
+        p = self.params
+        ready = self.count >= p.long_window
+        if idx is not None:
+            ticked = np.zeros(len(self.symbols), dtype=bool)
+            ticked[idx] = True
+            ready &= ticked
+        sma_diff = np.where(ready, self.short_sum / p.short_window - self.long_sum / p.long_window, 0.0)
+
+        buy_score = np.where(sma_diff > 0, sma_diff, 0.0)
+        sell_score = np.where(sma_diff <= 0, -sma_diff, 0.0)
+
+        fg = self.fear_greed()
+        if fg is not None:
+            fg = int(fg)
+            if fg <= p.extreme_fear:
+                buy_score += 5
+            elif fg <= p.fear:
+                buy_score += 2
+            elif fg >= p.extreme_greed:
+                sell_score += 5
+            elif fg >= p.greed:
+                sell_score += 2
+
+        sentiment = self.sentiment()
+        if sentiment > p.strong_sentiment:
+            buy_score += 3
+        elif sentiment > p.moderate_sentiment:
+            buy_score += 1
+        elif sentiment < -p.strong_sentiment:
+            sell_score += 3
+        elif sentiment < -p.moderate_sentiment:
+            sell_score += 1
+
+        trades = []
+
+        # At most one action per symbol per evaluation, as in TradingLogic
+        buys = np.flatnonzero(ready & (self.positions == 0) & (buy_score >= p.score_threshold))
+        sells = np.flatnonzero(ready & (self.positions > 0) & (sell_score >= p.score_threshold))
+
+        # Sells first so their proceeds are available to this batch's buys
+        if len(sells):
+            proceeds = self.positions[sells] * self.last_price[sells] * (1 - p.commission_fee)
+            self.cash += proceeds.sum()
+            self.positions[sells] = 0
+            trades += [{'symbol': self.symbols[i], 'action': 'Sell', 'price': self.last_price[i],
+                        'amount': amount, 'score': sell_score[i]} for i, amount in zip(sells, proceeds)]
+
+        if len(buys) and self.cash > 0:
+            wanted = self.max_allocation[buys] * self.equity()
+            # Fill buys in symbol order until the shared cash runs out
+            spent_before = np.cumsum(wanted) - wanted
+            spend = np.clip(self.cash - spent_before, 0, wanted)
+            filled = spend > 0
+            buys, spend = buys[filled], spend[filled]
+            self.positions[buys] = spend * (1 - p.commission_fee) / self.last_price[buys]
+            self.cash -= spend.sum()
+            trades += [{'symbol': self.symbols[i], 'action': 'Buy', 'price': self.last_price[i],
+                        'amount': amount, 'score': buy_score[i]} for i, amount in zip(buys, spend)]
+
+        return trades
+
+    # Apply and evaluate a batch one tick round at a time; returns the trades of every round
+    def process_batch(self, symbol_indices, prices):
+        trades = []
+        for idx, round_prices in self._rounds(symbol_indices, prices):
+            self._apply(idx, round_prices)
+            trades += self.evaluate(idx)
+        self._batch_done()
+        return trades
+
+    def get_state(self):
+        return {
+            'cash': self.cash,
+            'equity': self.equity(),
+            'positions': {symbol: self.positions[i] for i, symbol in enumerate(self.symbols) if self.positions[i] > 0}
+        }
+
+
+# Collects trades from a MarketDataClient (or ReplayFeed) and hands them to a
+# PortfolioEngine in batches every `interval` seconds
+class PortfolioRunner:
+    def __init__(self, portfolio, market_data, interval=0.1, on_trades=None):
+        self.portfolio = portfolio
+        self.market_data = market_data
+        self.interval = interval
+        self.on_trades = on_trades
+        self.running = False
+
+        self._pending_indices = []
+        self._pending_prices = []
+        self._lock = threading.Lock()
+        self._callbacks = {}
+
+    def start(self):
+        self.running = True
+        for symbol, i in self.portfolio.index.items():
+            stream = f"{symbol}@trade"
+            self._callbacks[stream] = self.market_data.subscribe(stream, lambda data, i=i: self._on_trade(i, data))
+        self.market_data.start()
+
+    def stop(self):
+        self.running = False
+        for stream, callback in self._callbacks.items():
+            self.market_data.unsubscribe(stream, callback)
+        self._callbacks = {}
+        self.market_data.stop()
+
+    def _on_trade(self, i, data):
+        price = float(data['p'])
+        with self._lock:
+            self._pending_indices.append(i)
+            self._pending_prices.append(price)
+
+    def flush(self):
+        with self._lock:
+            indices, self._pending_indices = self._pending_indices, []
+            prices, self._pending_prices = self._pending_prices, []
+        if not indices:
+            return []
+        trades = self.portfolio.process_batch(indices, prices)
+        if trades and self.on_trades:
+            self.on_trades(trades)
+        return trades
+
+    def run_forever(self):
+        self.start()
+        try:
+            while self.running and self.market_data.running:
+                time.sleep(self.interval)
+                self.flush()
+            self.flush()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+def _log_trades(trades):
+    for trade in trades:
+        print(f"{trade['action']} {trade['symbol'].upper()} at ${trade['price']:.4f} "
+              f"(${trade['amount']:.2f}, score {trade['score']:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the strategy across many symbols with one cash balance")
+    parser.add_argument('symbols', nargs='+', help="Symbols such as btcusdt ethusdt")
+    parser.add_argument('--balance', type=float, default=10000)
+    parser.add_argument('--max-allocation', type=float, default=0.1, help="Max fraction of equity per symbol")
+    parser.add_argument('--replay', help="Directory of recorded ticks to replay instead of the live feed")
+    parser.add_argument('--speed', type=float, default=1.0)
+    args = parser.parse_args()
+    load_environment()
+
+    fear_greed = FearGreedProvider()
+    fear_greed.start()
+    # One sentiment cache shared by every symbol, read without blocking
+    sentiment = make_sentiment_engine()
+    if sentiment:
+        sentiment.start()
+    portfolio = PortfolioEngine(args.symbols, initial_balance=args.balance, max_allocation=args.max_allocation,
+                                sentiment=sentiment.get_sentiment if sentiment else None,
+                                fear_greed=lambda: fear_greed.index)
+    if args.replay:
+        from tick_store import ReplayFeed
+        market_data = ReplayFeed(args.replay, args.speed)
+    else:
+        market_data = MarketDataClient()
+    try:
+        PortfolioRunner(portfolio, market_data, on_trades=_log_trades).run_forever()
+    finally:
+        if sentiment:
+            sentiment.stop()
+        fear_greed.stop()
+    print(portfolio.get_state())
+
+
+if __name__ == "__main__":
+    main()
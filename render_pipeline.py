@@ -0,0 +1,82 @@
+import threading
+from collections import deque
+
+from latency import monitor
+
+
+# Hands engine events to Tk safely. Feed threads call the push_* methods, which never touch
+# a widget; the Tk mainloop drains the pending events with root.after at a fixed
+# frame rate. Ticks and bar updates are coalesced as they arrive, so only the
+# latest of each is kept and drawn. Trades are never dropped: they are queued and
+# handed over in one batch on the next frame.
+class RenderPipeline:
+    def __init__(self, root, on_tick, on_trades, fps=10, on_bar=None):
+        self.root = root
+        self.on_tick = on_tick
+        self.on_trades = on_trades
+        self.on_bar = on_bar
+        self.interval_ms = max(1, int(1000 / fps))
+
+        self.coalesced = 0  # ticks and bars that were replaced by a newer one before being drawn
+        self.frames = 0
+
+        self._lock = threading.Lock()
+        self._latest_tick = None
+        self._latest_bar = None
+        self._trades = deque()
+        self._after_id = None
+
+    # Called from any thread
+    def push_tick(self, event):
+        with self._lock:
+            if self._latest_tick is not None:
+                self.coalesced += 1
+            self._latest_tick = event
+
+    def push_trade(self, event):
+        self._trades.append(event)
+
+    def push_bar(self, event):
+        with self._lock:
+            if self._latest_bar is not None:
+                self.coalesced += 1
+            self._latest_bar = event
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def stats(self):
+        return {
+            'queued': len(self._trades),
+            'coalesced': self.coalesced,
+            'frames': self.frames
+        }
+
+    # Runs on the Tk thread
+    def _drain(self):
+        monitor.set_gauge('render_backlog', len(self._trades))
+        with self._lock:
+            latest_tick, self._latest_tick = self._latest_tick, None
+            latest_bar, self._latest_bar = self._latest_bar, None
+        # Only what is queued now; trades pushed meanwhile wait for the next frame
+        trades = [self._trades.popleft() for _ in range(len(self._trades))]
+
+        try:
+            if latest_tick is not None:
+                self.on_tick(latest_tick)
+            if latest_bar is not None and self.on_bar:
+                self.on_bar(latest_bar)
+            if trades:
+                self.on_trades(trades)
+        except Exception as e:
+            print(f"Error rendering update: {e}")
+
+        self.frames += 1
+        monitor.set_gauge('render_coalesced', self.coalesced)
+        self._after_id = self.root.after(self.interval_ms, self._drain)
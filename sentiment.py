@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+
+from latency import monitor
+
+
+# What to return when the published sentiment is older than max_age
+STALE_POLICIES = ("neutral", "last")
+
+
+# Download the VADER lexicon only if it isn't installed already
+def ensure_vader_lexicon():
+    import nltk
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        nltk.download('vader_lexicon', quiet=True)
+
+
+def make_analyzer():
+    ensure_vader_lexicon()
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+# Source that pulls hot post titles from a subreddit through praw. The praw client
+# is built from environment variables on the first fetch unless one is passed in.
+class RedditSentimentSource:
+    def __init__(self, reddit=None, subreddit_name="Bitcoin", limit=100):
+        self.reddit = reddit
+        self.subreddit_name = subreddit_name
+        self.limit = limit
+
+    def client(self):
+        if self.reddit is None:
+            import praw
+            self.reddit = praw.Reddit(
+                client_id=os.environ.get('CLIENT_ID'),
+                client_secret=os.environ.get('CLIENT_SECRET'),
+                user_agent=os.environ.get('USER_AGENT', 'SentimentCollector')
+            )
+        return self.reddit
+
+    # Return a list of (post_id, title) pairs
+    def fetch_posts(self):
+        subreddit = self.client().subreddit(self.subreddit_name)
+        return [(post.id, post.title) for post in subreddit.hot(limit=self.limit)]
+
+
+# Refreshes the average VADER sentiment of a source on its own schedule.
+# Any object with a fetch_posts() method returning (post_id, title) pairs
+# can be used as the source, so tests can plug in a local fake.
+class SentimentEngine:
+    def __init__(self, source, refresh_interval=300, max_age=900, stale_policy="neutral", analyzer=None):
+        if stale_policy not in STALE_POLICIES:
+            raise ValueError(f"Unknown stale policy: {stale_policy}")
+
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.stale_policy = stale_policy
+        self.analyzer = analyzer
+
+        self._scores = {}  # post_id -> compound score
+        self._snapshot = (None, 0.0)  # (sentiment, unix timestamp), swapped as a whole
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # Fetch the latest posts, score only the ones not seen before and publish the average
+    def refresh(self):
+        if self.analyzer is None:
+            self.analyzer = make_analyzer()
+
+        start = monitor.now()
+        posts = self.source.fetch_posts()
+        monitor.record('sentiment_fetch', start)
+
+        scores = {}
+        for post_id, title in posts:
+            score = self._scores.get(post_id)
+            if score is None:
+                score = self.analyzer.polarity_scores(title)['compound']
+            scores[post_id] = score
+
+        # Only keep scores for posts that are still in the listing
+        self._scores = scores
+
+        average_sentiment = sum(scores.values()) / len(scores) if scores else 0
+        self._snapshot = (average_sentiment, time.time())
+        return average_sentiment
+
+    # Latest published sentiment and the time it was computed
+    def get_snapshot(self):
+        return self._snapshot
+
+    # Sentiment used by the decision path, with the staleness policy applied
+    def get_sentiment(self, now=None):
+        sentiment, timestamp = self._snapshot
+        if sentiment is None:
+            return 0
+
+        now = time.time() if now is None else now
+        if self.max_age is not None and now - timestamp > self.max_age and self.stale_policy == "neutral":
+            return 0
+        return sentiment
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    # Refresh once and return the seconds until the next refresh
+    def run_once(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Error refreshing sentiment: {e}")
+        return self.refresh_interval
+
+    def _run(self, stop_event):
+        while not stop_event.is_set():
+            stop_event.wait(self.run_once())
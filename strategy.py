@@ -0,0 +1,33 @@
+from dataclasses import dataclass, fields, asdict
+
+
+# Tunable constants of the scoring and execution rules, shared by TradingLogic,
+# the backtester and the parameter sweep
+@dataclass(frozen=True)
+class StrategyParams:
+    short_window: int = 20  # SMA windows
+    long_window: int = 50
+    extreme_fear: int = 20  # Fear & Greed bands
+    fear: int = 50
+    greed: int = 60
+    extreme_greed: int = 80
+    strong_sentiment: float = 0.5  # Sentiment bands, applied symmetrically
+    moderate_sentiment: float = 0.2
+    score_threshold: float = 3.5  # Minimum buy/sell score to trade
+    commission_fee: float = 0.001  # 0.1% commission per trade
+
+    def __post_init__(self):
+        if not 0 < self.short_window < self.long_window:
+            raise ValueError("short_window must be positive and smaller than long_window")
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, values):
+        names = {field.name: field.type for field in fields(cls)}
+        return cls(**{name: names[name](value) for name, value in values.items() if name in names})
+
+    @classmethod
+    def field_names(cls):
+        return [field.name for field in fields(cls)]
@@ -0,0 +1,182 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtest import load_history, load_series, align_series, rolling_mean, compute_scores, simulate, summarize
+from strategy import StrategyParams
+
+
+# Small default grid around the live settings
+DEFAULT_GRID = {
+    'short_window': [10, 20, 30],
+    'long_window': [50, 100],
+    'extreme_fear': [20],
+    'fear': [40, 50],
+    'greed': [60],
+    'extreme_greed': [80],
+    'strong_sentiment': [0.5],
+    'moderate_sentiment': [0.2],
+    'score_threshold': [2.5, 3.5, 4.5],
+    'commission_fee': [0.001]
+}
+
+STAT_COLUMNS = ['total_return', 'max_drawdown', 'trade_count', 'final_equity']
+LOWER_IS_BETTER = {'max_drawdown'}
+
+# Per-worker views onto the shared price history, set up by _init_worker
+_worker_arrays = None
+_worker_memory = None
+_worker_sma_cache = {}
+
+
+# Every valid StrategyParams combination of a {field: [values]} grid
+def expand_grid(grid):
+    names = StrategyParams.field_names()
+    values = [grid.get(name, [getattr(StrategyParams, name)]) for name in names]
+    combinations = []
+    for combination in itertools.product(*values):
+        try:
+            combinations.append(StrategyParams(**dict(zip(names, combination))))
+        except ValueError:
+            continue  # e.g. short_window >= long_window
+    return combinations
+
+
+# Key used to recognise combinations that already have results
+def _params_key(values):
+    return tuple(str(values[name]) for name in StrategyParams.field_names())
+
+
+# Copy the close / Fear & Greed / sentiment arrays into one shared memory block
+# so workers map it instead of receiving a pickled copy per task
+def share_arrays(close, fear_greed, sentiment):
+    stacked = np.vstack([close, fear_greed, sentiment]).astype(np.float64)
+    memory = shared_memory.SharedMemory(create=True, size=stacked.nbytes)
+    shared = np.ndarray(stacked.shape, dtype=np.float64, buffer=memory.buf)
+    shared[:] = stacked
+    return memory, stacked.shape
+
+
+def _init_worker(memory_name, shape):
+    global _worker_arrays, _worker_memory
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    _worker_arrays = np.ndarray(shape, dtype=np.float64, buffer=_worker_memory.buf)
+
+
+def _cached_sma(close, window):
+    sma = _worker_sma_cache.get(window)
+    if sma is None:
+        sma = rolling_mean(close, window)
+        _worker_sma_cache[window] = sma
+    return sma
+
+
+def _evaluate(values, initial_balance):
+    params = StrategyParams.from_dict(values)
+    close, fear_greed, sentiment = _worker_arrays
+    _, buy_score, sell_score = compute_scores(
+        close, fear_greed, sentiment, params,
+        sma_short=_cached_sma(close, params.short_window),
+        sma_long=_cached_sma(close, params.long_window)
+    )
+    trades, equity = simulate(close, buy_score, sell_score, params, initial_balance)
+    return values, summarize(equity, trades, initial_balance)
+
+
+# Sort key that puts the best result first for the chosen stat
+def _rank_key(rank_by):
+    sign = 1 if rank_by in LOWER_IS_BETTER else -1
+    return lambda row: sign * float(row[rank_by])
+
+
+# Results already written by an earlier, possibly interrupted, run
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+# Run every combination across a process pool, appending each result to results_path
+# as it finishes. Combinations already in results_path are skipped, so an interrupted
+# sweep picks up where it stopped. Returns all rows ranked by rank_by, best first.
+def run_sweep(close, fear_greed, sentiment, combinations, results_path, workers=None,
+              initial_balance=10000, rank_by='total_return', progress_every=100):
+    rows = load_results(results_path)
+    done = {_params_key(row) for row in rows}
+    pending = [params.to_dict() for params in combinations if _params_key(params.to_dict()) not in done]
+    print(f"{len(combinations)} combinations, {len(done)} already done, {len(pending)} to run")
+
+    columns = StrategyParams.field_names() + STAT_COLUMNS
+    write_header = not os.path.exists(results_path) or os.path.getsize(results_path) == 0
+
+    memory, shape = share_arrays(close, fear_greed, sentiment)
+    try:
+        with open(results_path, 'a', newline='') as f, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                    initargs=(memory.name, shape)) as executor:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            if write_header:
+                writer.writeheader()
+
+            futures = [executor.submit(_evaluate, values, initial_balance) for values in pending]
+            for completed, future in enumerate(as_completed(futures), 1):
+                values, stats = future.result()
+                row = {**values, **stats}
+                writer.writerow(row)
+                f.flush()
+                rows.append({name: str(value) for name, value in row.items()})
+
+                if completed % progress_every == 0:
+                    best = min(rows, key=_rank_key(rank_by))
+                    print(f"{completed}/{len(pending)} done, best {rank_by}: {float(best[rank_by]):.4f}")
+    finally:
+        memory.close()
+        memory.unlink()
+
+    return sorted(rows, key=_rank_key(rank_by))
+
+
+def print_table(rows, limit=20):
+    columns = StrategyParams.field_names() + STAT_COLUMNS
+    print("rank  " + "  ".join(columns))
+    for rank, row in enumerate(rows[:limit], 1):
+        print(f"{rank:<4}  " + "  ".join(str(row[name]) for name in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid-search strategy parameters over recorded history")
+    parser.add_argument('history', help="CSV or Parquet file of trades or klines")
+    parser.add_argument('--fear-greed', help="CSV or Parquet file with time and value columns")
+    parser.add_argument('--sentiment', help="CSV or Parquet file with time and value columns")
+    parser.add_argument('--grid', help="JSON file mapping StrategyParams fields to lists of values")
+    parser.add_argument('--out', default='sweep_results.csv', help="Results file, reused to resume a sweep")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--balance', type=float, default=10000)
+    parser.add_argument('--rank-by', default='total_return', choices=STAT_COLUMNS)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    close = history['close'].to_numpy(dtype=float)
+    fear_greed = align_series(history.index, load_series(args.fear_greed) if args.fear_greed else None)
+    sentiment = align_series(history.index, load_series(args.sentiment) if args.sentiment else None)
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+
+    rows = run_sweep(close, fear_greed, sentiment, expand_grid(grid), args.out,
+                     workers=args.workers, initial_balance=args.balance, rank_by=args.rank_by)
+    print_table(rows, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import run_backtest
+from trading_logic import TradingLogic
+
+
+# Context stand-ins whose reading the test moves bar by bar
+class FixedFearGreed:
+    index = None
+    classification = None
+
+
+class FixedSentiment:
+    value = 0.0
+
+    def get_sentiment(self):
+        return self.value
+
+
+def make_inputs(count=8000, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2024-01-01', periods=count, freq='1min')
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    # Readings that change every few hundred bars and cross every scoring band
+    fear_greed = np.repeat(rng.integers(0, 101, count // 200 + 1), 200)[:count].astype(float)
+    sentiment = np.repeat(rng.uniform(-0.5, 0.5, count // 300 + 1), 300)[:count]
+    return pd.DataFrame({'close': close}, index=index), fear_greed, sentiment
+
+
+def live_trades(history, fear_greed, sentiment):
+    provider = FixedFearGreed()
+    logic = TradingLogic(enable_sentiment=False, fear_greed_provider=provider)
+    logic.sentiment_engine = FixedSentiment()
+    trades = []
+    for bar, price in enumerate(history['close']):
+        provider.index = fear_greed[bar]
+        logic.sentiment_engine.value = sentiment[bar]
+        logic.update_price_data(price)
+        decision = logic.apply_trading_logic()[0]
+        if decision != "Hold":
+            trades.append((history.index[bar], decision, price, logic.simulated_balance, logic.btc_position))
+    return trades, logic
+
+
+# The vectorized backtest makes the same trades as TradingLogic fed the same bars one by one
+def test_backtest_matches_trading_logic():
+    history, fear_greed, sentiment = make_inputs()
+    result = run_backtest(history, pd.Series(fear_greed, index=history.index),
+                          pd.Series(sentiment, index=history.index))
+    expected, logic = live_trades(history, fear_greed, sentiment)
+
+    assert len(expected) > 20
+    assert len(result.trades) == len(expected)
+    for row, (time, decision, price, balance, position) in zip(result.trades.itertuples(), expected):
+        assert (row.time, row.action) == (time, decision)
+        assert row.price == pytest.approx(price)
+        assert row.balance == pytest.approx(balance)
+        assert row.btc_position == pytest.approx(position)
+    final = logic.simulated_balance + logic.btc_position * history['close'].iloc[-1]
+    assert result.equity.iloc[-1] == pytest.approx(final)
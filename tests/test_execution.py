@@ -0,0 +1,208 @@
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from execution import BUY, LIMIT, SELL, LiveExecution, Order, OrderBook, PaperExecution, SymbolFilters, make_executor
+from mock_exchange import MockExchange
+from trading_logic import TradingLogic
+
+
+@pytest.fixture
+def exchange():
+    exchange = MockExchange().start()
+    yield exchange
+    exchange.stop()
+
+
+@pytest.fixture
+def live(exchange):
+    live = LiveExecution('test-key', 'test-secret', base_url=exchange.url)
+    live.last_price = 30000.0
+    yield live
+    live.stop()
+
+
+def place(live, order):
+    done = threading.Event()
+    live.submit(order, on_done=lambda order: done.set())
+    assert done.wait(5)
+    return order
+
+
+def test_filters_from_exchange_info(exchange):
+    filters = SymbolFilters.from_exchange_info(exchange.exchange_info()['symbols'][0])
+    assert filters.floor_quantity(0.0411522633744856) == Decimal('0.04115')
+    assert filters.floor_quote(1234.567891234567) == Decimal('1234.56789123')
+    assert filters.round_price(29995.555, BUY) == Decimal('29995.55')
+    assert filters.round_price(29995.551, SELL) == Decimal('29995.56')
+
+
+# Unrounded amounts, like a whole balance or position, are floored to what the exchange accepts
+def test_orders_pass_the_exchange_filters(exchange, live):
+    buy = place(live, Order(BUY, quote_quantity=1234.567891234567))
+    assert buy.status == 'FILLED'
+    sell = place(live, Order(SELL, quantity=0.0411522633744856))
+    assert sell.status == 'FILLED'
+    assert sell.filled == pytest.approx(0.04115)
+    limit = place(live, Order(BUY, quantity=0.0123456789, order_type=LIMIT, price=29995.555))
+    assert limit.status == 'NEW'
+    assert exchange.orders[f"bot-{limit.id}"]['executedQty'] == '0.00000000'
+
+
+def test_orders_below_the_minimums_are_not_sent(exchange, live):
+    requests = exchange.requests
+    assert place(live, Order(SELL, quantity=0.000001)).status == 'REJECTED'  # below the lot size
+    assert place(live, Order(SELL, quantity=0.0001)).status == 'REJECTED'  # $3 < $5 notional
+    assert place(live, Order(BUY, quote_quantity=1.0)).status == 'REJECTED'
+    assert exchange.requests == requests
+    assert live.min_quantity() == pytest.approx(0.00001)
+
+
+def test_mock_exchange_rejects_unfiltered_orders(exchange):
+    assert exchange.filter_failure({'side': SELL, 'quantity': '0.041152263'}) == 'Filter failure: LOT_SIZE'
+    assert exchange.filter_failure({'side': BUY, 'quoteOrderQty': '1234.567891234'}) == 'Filter failure: quote precision'
+    assert exchange.filter_failure({'side': BUY, 'quantity': '0.01', 'price': '29995.555'}) == \
+        'Filter failure: PRICE_FILTER'
+    assert exchange.filter_failure({'side': BUY, 'quoteOrderQty': '1.00'}) == 'Filter failure: NOTIONAL'
+    assert exchange.filter_failure({'side': SELL, 'quantity': '0.04115'}) is None
+
+
+def test_live_executor_needs_api_keys(monkeypatch):
+    monkeypatch.delenv('BINANCE_API_KEY', raising=False)
+    monkeypatch.setenv('BINANCE_API_SECRET', 'secret')
+    with pytest.raises(ValueError, match='BINANCE_API_KEY'):
+        make_executor('live')
+
+
+def make_book():
+    book = OrderBook()
+    book.apply_snapshot({'bids': [['29990.00', '1.0'], ['29980.00', '2.0']],
+                         'asks': [['30010.00', '0.5'], ['30020.00', '1.0'], ['30030.00', '2.0']]})
+    return book
+
+
+@pytest.fixture
+def paper():
+    paper = PaperExecution(latency=0.01, maker_fee=0.0002, taker_fee=0.001, book=make_book())
+    yield paper
+    paper.stop()
+
+
+def execute(paper, order, timeout=5):
+    fills = []
+    done = threading.Event()
+    paper.submit(order, on_fill=fills.append, on_done=lambda order: done.set())
+    assert done.wait(timeout)
+    return fills
+
+
+# A market order takes each level in turn and pays the taker fee in the asset it receives
+def test_paper_market_order_walks_the_book(paper):
+    order = Order(BUY, quantity=1.0)
+    fills = execute(paper, order)
+    assert [(fill.price, fill.quantity) for fill in fills] == [(30010.0, 0.5), (30020.0, 0.5)]
+    assert order.status == 'FILLED'
+    assert order.average_price == pytest.approx(30015.0)
+    assert all(fill.liquidity == 'taker' and fill.fee_asset == 'BASE' for fill in fills)
+    assert order.fees == pytest.approx(1.0 * 0.001)
+    assert paper.book.asks == [[30020.0, 0.5], [30030.0, 2.0]]
+
+
+def test_paper_partial_fill_then_expiry(paper):
+    order = Order(SELL, quantity=5.0)
+    fills = execute(paper, order)
+    assert order.status == 'PARTIALLY_FILLED_EXPIRED'
+    assert order.filled == pytest.approx(3.0)
+    assert [fill.fee_asset for fill in fills] == ['QUOTE', 'QUOTE']
+    assert order.fees == pytest.approx((29990.0 * 1.0 + 29980.0 * 2.0) * 0.001)
+    assert not paper.book.bids
+
+
+# The order is matched against the book as it is when it arrives, not when it was sent
+def test_paper_latency_before_matching():
+    paper = PaperExecution(latency=0.2, book=make_book())
+    try:
+        order = Order(BUY, quantity=0.1)
+        done = threading.Event()
+        sent = time.monotonic()
+        paper.submit(order, on_done=lambda order: done.set())
+        paper.on_depth({'bids': [['30990.00', '1.0']], 'asks': [['31000.00', '1.0']]})
+        assert not done.wait(0.1)
+        assert done.wait(5)
+        assert time.monotonic() - sent >= 0.2
+        assert order.average_price == pytest.approx(31000.0)
+    finally:
+        paper.stop()
+
+
+# A limit order below the best ask rests and fills as maker when trades reach its price
+def test_paper_resting_limit_fills_as_maker(paper):
+    order = Order(BUY, quantity=1.0, order_type=LIMIT, price=30000.0)
+    fills = []
+    done = threading.Event()
+    paper.submit(order, on_fill=fills.append, on_done=lambda order: done.set())
+    time.sleep(0.1)
+    assert order.status == 'NEW' and not fills
+
+    paper.on_trade({'p': '30005.00', 'q': '0.4'})  # above the limit
+    assert not fills
+    paper.on_trade({'p': '29999.00', 'q': '0.4'})
+    assert order.status == 'PARTIALLY_FILLED'
+    paper.on_trade({'p': '30000.00', 'q': '1.0'})
+    assert done.is_set() and order.status == 'FILLED'
+    assert [(fill.price, fill.quantity) for fill in fills] == [(30000.0, 0.4), (30000.0, 0.6)]
+    assert all(fill.liquidity == 'maker' for fill in fills)
+    assert order.fees == pytest.approx(1.0 * 0.0002)
+
+
+class FixedFearGreed:
+    classification = None
+
+    def __init__(self, index):
+        self.index = index
+
+
+# Positions below the exchange's minimum lot
+class LotSizePaperExecution(PaperExecution):
+    def min_quantity(self):
+        return 0.001
+
+
+def wait_for_order(logic, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        fills, finished = logic.apply_fills()
+        if finished:
+            return finished[0]
+        time.sleep(0.01)
+    raise AssertionError("order not done")
+
+
+def test_apply_fills_clears_the_order_and_zeroes_dust():
+    paper = LotSizePaperExecution(latency=0.01, book=make_book())
+    fear_greed = FixedFearGreed(10)  # extreme fear: buy
+    logic = TradingLogic(enable_sentiment=False, fear_greed_provider=fear_greed, executor=paper)
+    try:
+        for _ in range(logic.params.long_window):
+            logic.update_price_data(30000.0)
+        assert logic.apply_trading_logic()[0] == "Buy"
+        assert logic.apply_trading_logic()[0] == "Hold"  # waiting for the order
+        order = wait_for_order(logic)
+        assert order.status == 'FILLED'
+        assert logic.pending_order is None
+        assert logic.simulated_balance == pytest.approx(0, abs=1e-6)
+        assert logic.btc_position == pytest.approx(order.filled - order.fees)
+
+        # Bids for all but 0.0005 BTC of the position, less than the minimum lot
+        paper.on_depth({'bids': [['29990.00', repr(logic.btc_position - 0.0005)]], 'asks': []})
+        fear_greed.index = 90  # extreme greed: sell
+        assert logic.apply_trading_logic()[0] == "Sell"
+        order = wait_for_order(logic)
+        assert order.status == 'PARTIALLY_FILLED_EXPIRED'
+        assert logic.pending_order is None
+        assert logic.btc_position == 0
+        assert logic.simulated_balance == pytest.approx(order.spent - order.fees)
+    finally:
+        paper.stop()
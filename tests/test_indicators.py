@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import SMA
+from market_context import FearGreedProvider
+from trading_logic import TradingLogic
+
+
+def random_walk(count=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return 30000 * np.exp(np.cumsum(rng.normal(0, 0.001, count)))
+
+
+@pytest.mark.parametrize('window', [20, 50])
+def test_sma_matches_pandas_rolling_mean(window):
+    prices = random_walk()
+    expected = pd.Series(prices).rolling(window=window).mean()
+
+    sma = SMA(window)
+    for i, price in enumerate(prices):
+        value = sma.update(price)
+        if i < window - 1:
+            assert value is None
+        else:
+            assert value == pytest.approx(expected[i], rel=1e-12, abs=1e-9)
+
+
+# The values TradingLogic scores on are the last values of the old per-tick DataFrame
+def test_trading_logic_smas_match_pandas():
+    logic = TradingLogic(enable_sentiment=False, fear_greed_provider=FearGreedProvider(cache_path=None))
+    prices = random_walk(2000, seed=1)
+    for i, price in enumerate(prices):
+        logic.update_price_data(price)
+        if i < 49:
+            continue
+        df = pd.DataFrame(list(logic.price_data), columns=['price'])
+        assert logic.indicators['SMA_short'] == pytest.approx(df['price'].rolling(window=20).mean().iloc[-1],
+                                                              rel=1e-12, abs=1e-9)
+        assert logic.indicators['SMA_long'] == pytest.approx(df['price'].rolling(window=50).mean().iloc[-1],
+                                                             rel=1e-12, abs=1e-9)
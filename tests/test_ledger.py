@@ -0,0 +1,106 @@
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+from ledger import Ledger
+from market_context import FearGreedProvider
+from trading_logic import TradingLogic
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = Ledger(str(tmp_path / 'ledger.db'), batch_interval=0.01)
+    yield ledger
+    ledger.close()
+
+
+def make_logic():
+    return TradingLogic(enable_sentiment=False, fear_greed_provider=FearGreedProvider(cache_path=None))
+
+
+def trade(decision, price, balance, btc_position):
+    return {'time': datetime.now().astimezone(), 'price': price, 'decision': decision,
+            'action': f"Simulated {decision} at ${price:.2f}", 'balance': balance, 'btc_position': btc_position}
+
+
+def state(balance, btc_position, prices):
+    return {'balance': balance, 'btc_position': btc_position, 'last_trade': "No trade executed.",
+            'price_data': prices}
+
+
+# The price window comes from the snapshot and the portfolio from the last trade after it
+def test_restore_snapshot_and_tail(ledger):
+    ledger.append_trade(trade("Buy", 30000.0, 0, 0.33))
+    ledger.write_snapshot(state(0, 0.33, [30000.0, 30010.0]))
+    ledger.append_trade(trade("Sell", 30020.0, 9900.0, 0))
+    assert ledger.flush(5)
+
+    logic = make_logic()
+    assert ledger.restore(logic)
+    assert (logic.simulated_balance, logic.btc_position) == (9900.0, 0)
+    assert logic.last_trade == "Simulated Sell at $30020.00"
+    assert list(logic.price_data) == [30000.0, 30010.0]
+
+
+def test_restore_tail_without_snapshot(ledger):
+    ledger.append_trade(trade("Buy", 30000.0, 0, 0.33))
+    assert ledger.flush(5)
+
+    logic = make_logic()
+    assert ledger.restore(logic)
+    assert (logic.simulated_balance, logic.btc_position) == (0, 0.33)
+    assert not logic.price_data
+
+
+def test_restore_drops_a_stale_price_window(ledger, monkeypatch):
+    ledger.write_snapshot(state(5000.0, 0.1, [30000.0, 30010.0]))
+    assert ledger.flush(5)
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + ledger.max_window_age + 60)
+    logic = make_logic()
+    assert ledger.restore(logic)
+    assert (logic.simulated_balance, logic.btc_position) == (5000.0, 0.1)
+    assert not logic.price_data
+
+
+def test_nothing_to_restore(ledger):
+    logic = make_logic()
+    assert not ledger.restore(logic)
+    assert logic.simulated_balance == 10000
+
+
+# A snapshot json can't encode is skipped without losing the trades of its batch
+def test_bad_snapshot_keeps_the_batch(ledger):
+    ledger.append_trade(trade("Buy", 30000.0, 0, 0.33))
+    ledger.write_snapshot(state(0, 0.33, [object()]))
+    ledger.append_trade(trade("Sell", 30020.0, 9900.0, 0))
+    assert ledger.flush(5)
+
+    assert [event['decision'] for event in ledger.trades_after(0)] == ["Buy", "Sell"]
+    assert ledger.latest_snapshot() is None
+    assert ledger.written == 2
+
+
+# Rows of a batch that failed to commit are written with the next batch
+def test_failed_batch_is_retried(ledger, monkeypatch):
+    write = ledger._write
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def flaky_write(*args):
+        if failures:
+            raise failures.pop()
+        return write(*args)
+
+    monkeypatch.setattr(ledger, '_write', flaky_write)
+    ledger.append_trade(trade("Buy", 30000.0, 0, 0.33))
+    ledger.write_snapshot(state(0, 0.33, [30000.0]))
+    assert ledger.flush(5)
+    assert ledger.trades_after(0) == []
+
+    ledger.append_trade(trade("Sell", 30020.0, 9900.0, 0))
+    assert ledger.flush(5)
+    assert [event['decision'] for event in ledger.trades_after(0)] == ["Buy", "Sell"]
+    assert ledger.latest_snapshot()[2] == 1  # the snapshot still covers only the first trade
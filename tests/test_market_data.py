@@ -0,0 +1,170 @@
+import time
+
+import pytest
+
+from async_runtime import AsyncMarketData
+from engine import TradingEngine
+from market_context import FearGreedProvider
+from market_data import MarketDataClient
+from mock_market import MockMarket
+from trading_logic import TradingLogic
+
+
+MINUTE = 60_000
+
+
+@pytest.fixture
+def market():
+    market = MockMarket().start()
+    yield market
+    market.stop()
+
+
+def make_client(client_class, market):
+    return client_class(ws_url=market.ws_url, rest_url=market.rest_url, min_backoff=0.05, max_backoff=0.2)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def trade(price, trade_time):
+    return {'e': 'trade', 'E': trade_time, 's': 'BTCUSDT', 'p': f"{price:.2f}", 'q': '0.01000', 'T': trade_time,
+            'm': False}
+
+
+def kline(open_time, price, closed=False):
+    return {'e': 'kline', 'E': open_time, 's': 'BTCUSDT', 'k': {
+        't': open_time, 'T': open_time + MINUTE - 1, 's': 'BTCUSDT', 'i': '1m', 'o': f"{price:.2f}",
+        'h': f"{price:.2f}", 'l': f"{price:.2f}", 'c': f"{price:.2f}", 'v': '1.00000', 'x': closed
+    }}
+
+
+# Closed REST klines for the minutes after `first_open`, closing at 30001, 30002, ...
+def add_missed_klines(market, first_open, count):
+    for i in range(count):
+        open_time = first_open + i * MINUTE
+        price = 30000.0 + i
+        market.add_kline('btcusdt', '1m', open_time, open_time + MINUTE - 1, price, price + 2, price - 1, price + 1, 2.0)
+
+
+@pytest.mark.parametrize('client_class', [MarketDataClient, AsyncMarketData])
+def test_reconnects_and_backfills_missed_klines(market, client_class):
+    client = make_client(client_class, market)
+    klines = []
+    client.subscribe('btcusdt@kline_1m', klines.append)
+    client.start()
+    try:
+        assert market.wait_for_connections(1)
+        first_open = (int(time.time() * 1000) // MINUTE - 10) * MINUTE
+        market.publish('btcusdt@kline_1m', kline(first_open, 30000.0))
+        assert wait_for(lambda: len(klines) == 1)
+
+        add_missed_klines(market, first_open, 5)
+        market.disconnect()
+        assert market.wait_for_connections(2)
+        assert wait_for(lambda: len(klines) == 6)
+
+        backfilled = klines[1:]
+        assert all(data.get('backfill') for data in backfilled)
+        assert [data['k']['t'] for data in backfilled] == [first_open + i * MINUTE for i in range(5)]
+        assert all(data['k']['x'] for data in backfilled)
+        assert client.reconnects >= 1
+
+        # Live messages flow again on the new connection
+        market.publish('btcusdt@kline_1m', kline(first_open + 5 * MINUTE, 30010.0))
+        assert wait_for(lambda: len(klines) == 7)
+    finally:
+        client.stop()
+
+
+@pytest.mark.parametrize('client_class', [MarketDataClient, AsyncMarketData])
+def test_backfill_fills_the_indicator_window(market, client_class):
+    client = make_client(client_class, market)
+    logic = TradingLogic(enable_sentiment=False, fear_greed_provider=FearGreedProvider(cache_path=None))
+    # No Fear & Greed requests
+    logic.start_market_context = lambda: None
+    logic.context_refreshers = lambda: []
+    engine = TradingEngine(logic, market_data=client)
+    engine.start()
+    client.start()
+    try:
+        assert market.wait_for_connections(1)
+        first_open = (int(time.time() * 1000) // MINUTE - 10) * MINUTE
+        last_trade = first_open + 30_000
+        market.publish('btcusdt@trade', trade(29990.0, last_trade))
+        assert wait_for(lambda: len(logic.price_data) == 1)
+
+        # The minute of the last trade is not replayed again; the four after it are
+        add_missed_klines(market, first_open, 5)
+        market.disconnect()
+        assert market.wait_for_connections(2)
+        assert wait_for(lambda: len(logic.price_data) == 5)
+        assert list(logic.price_data) == [29990.0, 30002.0, 30003.0, 30004.0, 30005.0]
+
+        market.publish('btcusdt@trade', trade(30006.0, first_open + 5 * MINUTE + 1000))
+        assert wait_for(lambda: len(logic.price_data) == 6)
+
+        # A second drop backfills from the last kline again, without duplicates
+        market.disconnect()
+        assert market.wait_for_connections(3)
+        time.sleep(0.3)
+        assert list(logic.price_data)[-1] == 30006.0
+        assert len(logic.price_data) == 6
+    finally:
+        engine.stop()
+        client.stop()
+
+
+# Stop right after start, before the loop thread has created its stop event
+def test_async_stop_right_after_start():
+    client = AsyncMarketData(ws_url='ws://127.0.0.1:9', min_backoff=0.05)
+    client.subscribe('btcusdt@trade', lambda data: None)
+    for _ in range(10):
+        client.start()
+        client.stop()
+        client.join(5)
+        assert not client.running
+
+
+def test_backfill_closes_the_missed_bars(market):
+    from bar_aggregator import BarAggregator
+
+    client = make_client(MarketDataClient, market)
+    logic = TradingLogic(enable_sentiment=False, fear_greed_provider=FearGreedProvider(cache_path=None))
+    logic.start_market_context = lambda: None
+    engine = TradingEngine(logic, market_data=client, bars=BarAggregator('time', 60))
+    bars = []
+    engine.bus.subscribe('bar', lambda event: bars.append(event['k']) if event['k']['x'] else None)
+    ticks = []
+    engine.bus.subscribe('tick', ticks.append)
+    engine.start()
+    client.start()
+    try:
+        assert market.wait_for_connections(1)
+        first_open = (int(time.time() * 1000) // MINUTE - 10) * MINUTE
+        market.publish('btcusdt@trade', trade(29990.0, first_open + 30_000))
+
+        add_missed_klines(market, first_open, 5)
+        market.disconnect()
+        assert market.wait_for_connections(2)
+        assert wait_for(lambda: len(bars) == 4)
+        assert [bar['t'] for bar in bars] == [first_open + i * MINUTE for i in range(4)]
+        assert [bar['c'] for bar in bars] == [29990.0, 30002.0, 30003.0, 30004.0]
+        assert (bars[1]['h'], bars[1]['l']) == (30003.0, 30000.0)
+        assert list(logic.price_data) == [29990.0, 30002.0, 30003.0, 30004.0]
+        assert not ticks  # the strategy is not evaluated on backfilled bars
+
+        # The first live trade of a later minute closes the backfilled bar in progress
+        market.publish('btcusdt@trade', trade(30006.0, first_open + 5 * MINUTE + 1000))
+        assert wait_for(lambda: len(ticks) == 1)
+        assert ticks[0]['price'] == 30005.0
+        assert ticks[0]['time'].timestamp() * 1000 == pytest.approx(first_open + 5 * MINUTE - 1)
+    finally:
+        engine.stop()
+        client.stop()
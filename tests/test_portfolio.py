@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from portfolio import PortfolioEngine
+from trading_logic import TradingLogic
+
+
+# Context stand-ins with a fixed reading
+class FixedFearGreed:
+    classification = None
+
+    def __init__(self, index):
+        self.index = index
+
+
+class FixedSentiment:
+    def __init__(self, value):
+        self.value = value
+
+    def get_sentiment(self):
+        return self.value
+
+
+def make_logic(fear_greed, sentiment=0.0):
+    logic = TradingLogic(enable_sentiment=False, fear_greed_provider=FixedFearGreed(fear_greed))
+    logic.sentiment_engine = FixedSentiment(sentiment)
+    return logic
+
+
+def random_walk(count, seed):
+    rng = np.random.default_rng(seed)
+    return 1000 + np.cumsum(rng.normal(0, 1, count))
+
+
+# Decisions TradingLogic makes on `prices`, as (action, price)
+def logic_trades(logic, prices):
+    trades = []
+    for price in prices:
+        logic.update_price_data(price)
+        decision = logic.apply_trading_logic()[0]
+        if decision != "Hold":
+            trades.append((decision, price))
+    return trades
+
+
+# One symbol holding all of the cash trades exactly like TradingLogic, batch after batch
+def test_single_symbol_matches_trading_logic():
+    prices = random_walk(3000, seed=1)
+    portfolio = PortfolioEngine(['btcusdt'], max_allocation=1.0, fear_greed=lambda: 25)
+    logic = make_logic(25)
+
+    trades = []
+    for start in range(0, len(prices), 50):
+        batch = prices[start:start + 50]
+        trades += portfolio.process_batch(np.zeros(len(batch), dtype=np.int64), batch)
+        logic_trades(logic, batch)
+        assert portfolio.cash == pytest.approx(logic.simulated_balance)
+        assert portfolio.positions[0] == pytest.approx(logic.btc_position)
+
+    expected = logic_trades(make_logic(25), prices)
+    assert len(expected) > 10
+    assert [(trade['action'], trade['price']) for trade in trades] == expected
+
+
+# A symbol that ticks once in a batch is scored once, however often the others tick
+def test_rarely_ticking_symbol_trades_once_per_tick():
+    rng = np.random.default_rng(2)
+    fast = random_walk(2000, seed=3)
+    slow = random_walk(100, seed=4)
+    # Extreme fear and bearish sentiment: a flat symbol is bought back as soon as it is sold
+    portfolio = PortfolioEngine(['aaa', 'bbb'], initial_balance=1e6, fear_greed=lambda: 10, sentiment=lambda: -0.6)
+
+    trades = []
+    for batch in range(100):
+        # 20 ticks of aaa with the one tick of bbb somewhere among them
+        at = rng.integers(0, 21)
+        indices = np.insert(np.zeros(20, dtype=np.int64), at, 1)
+        prices = np.insert(fast[batch * 20:(batch + 1) * 20], at, slow[batch])
+        batch_trades = portfolio.process_batch(indices, prices)
+        assert sum(trade['symbol'] == 'bbb' for trade in batch_trades) <= 1
+        trades += batch_trades
+
+    for symbol, prices in (('aaa', fast), ('bbb', slow)):
+        expected = logic_trades(make_logic(10, -0.6), prices)
+        assert len(expected) > 5
+        assert [(trade['action'], trade['price']) for trade in trades if trade['symbol'] == symbol] == expected
@@ -0,0 +1,89 @@
+import pytest
+
+from sentiment import SentimentEngine
+
+
+class FakeSource:
+    def __init__(self, posts):
+        self.posts = posts
+
+    def fetch_posts(self):
+        return list(self.posts)
+
+
+# Scores a title as the number in it and counts the calls
+class FakeAnalyzer:
+    def __init__(self):
+        self.scored = []
+
+    def polarity_scores(self, text):
+        self.scored.append(text)
+        return {'compound': float(text)}
+
+
+def make_engine(posts, **kwargs):
+    analyzer = FakeAnalyzer()
+    return SentimentEngine(FakeSource(posts), analyzer=analyzer, **kwargs), analyzer
+
+
+def test_only_new_posts_are_scored():
+    engine, analyzer = make_engine([('a', '0.5'), ('b', '-0.1')])
+    assert engine.refresh() == pytest.approx(0.2)
+    assert analyzer.scored == ['0.5', '-0.1']
+
+    engine.source.posts = [('a', '0.5'), ('b', '-0.1'), ('c', '0.8')]
+    assert engine.refresh() == pytest.approx(0.4)
+    assert analyzer.scored == ['0.5', '-0.1', '0.8']
+
+
+def test_scores_of_posts_that_drop_out_are_evicted():
+    engine, analyzer = make_engine([('a', '0.9'), ('b', '-0.3')])
+    engine.refresh()
+
+    engine.source.posts = [('b', '-0.3')]
+    assert engine.refresh() == pytest.approx(-0.3)
+    assert set(engine._scores) == {'b'}
+
+    # A post that comes back is scored again
+    engine.source.posts = [('a', '0.9'), ('b', '-0.3')]
+    engine.refresh()
+    assert analyzer.scored == ['0.9', '-0.3', '0.9']
+
+
+def test_no_posts_is_neutral():
+    engine, _ = make_engine([])
+    assert engine.refresh() == 0
+    assert engine.get_sentiment() == 0
+
+
+def test_neutral_policy_drops_stale_sentiment():
+    engine, _ = make_engine([('a', '0.6')], max_age=900, stale_policy='neutral')
+    assert engine.get_sentiment() == 0  # nothing published yet
+    engine.refresh()
+    _, timestamp = engine.get_snapshot()
+    assert engine.get_sentiment(now=timestamp + 900) == pytest.approx(0.6)
+    assert engine.get_sentiment(now=timestamp + 901) == 0
+
+
+def test_last_policy_keeps_stale_sentiment():
+    engine, _ = make_engine([('a', '0.6')], max_age=900, stale_policy='last')
+    engine.refresh()
+    _, timestamp = engine.get_snapshot()
+    assert engine.get_sentiment(now=timestamp + 901) == pytest.approx(0.6)
+    assert engine.get_sentiment(now=timestamp + 86400) == pytest.approx(0.6)
+
+
+def test_unknown_stale_policy():
+    with pytest.raises(ValueError):
+        SentimentEngine(FakeSource([]), stale_policy='ignore')
+
+
+def test_failed_refresh_keeps_the_last_sentiment():
+    engine, _ = make_engine([('a', '0.4')], refresh_interval=120)
+    engine.refresh()
+
+    def fail():
+        raise ConnectionError("offline")
+    engine.source.fetch_posts = fail
+    assert engine.run_once() == 120
+    assert engine.get_sentiment() == pytest.approx(0.4)
@@ -0,0 +1,348 @@
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+
+# Column layouts. Each column of a segment is its own append-only little-endian
+# file, so any column can be memory-mapped on its own as a flat NumPy array.
+TRADE_COLUMNS = [
+    ('event_time', 'q'),  # E, ms
+    ('trade_time', 'q'),  # T, ms
+    ('price', 'd'),
+    ('qty', 'd'),
+    ('side', 'b')  # 1 = buyer initiated, -1 = seller initiated
+]
+KLINE_COLUMNS = [
+    ('event_time', 'q'),
+    ('open_time', 'q'),
+    ('close_time', 'q'),
+    ('open', 'd'),
+    ('high', 'd'),
+    ('low', 'd'),
+    ('close', 'd'),
+    ('volume', 'd'),
+    ('closed', 'b')
+]
+# Partial book depth (<symbol>@depth<N>): the time it was received and, per level, best
+# first, price and quantity of each side. Levels beyond DEPTH_LEVELS are not kept and
+# missing levels are stored with a zero quantity.
+DEPTH_LEVELS = 10
+DEPTH_COLUMNS = [('event_time', 'q')] + [
+    (f"{side}_{field}_{level}", 'd') for level in range(DEPTH_LEVELS) for side in ('bid', 'ask')
+    for field in ('price', 'qty')
+]
+
+
+def stream_columns(stream):
+    if stream.endswith('@trade'):
+        return TRADE_COLUMNS
+    if '@kline_' in stream:
+        return KLINE_COLUMNS
+    if '@depth' in stream:
+        return DEPTH_COLUMNS
+    raise ValueError(f"Unsupported stream for recording: {stream}")
+
+
+def trade_row(data):
+    return (data.get('E', data['T']), data['T'], float(data['p']), float(data['q']), -1 if data.get('m') else 1)
+
+
+def kline_row(data):
+    kline = data['k']
+    return (data.get('E', kline['T']), kline['t'], kline['T'], float(kline['o']), float(kline['h']),
+            float(kline['l']), float(kline['c']), float(kline['v']), 1 if kline['x'] else 0)
+
+
+def depth_row(data):
+    row = [data.get('E', int(time.time() * 1000))]
+    for level in range(DEPTH_LEVELS):
+        for side in ('bids', 'asks'):
+            levels = data[side]
+            price, qty = levels[level] if level < len(levels) else (0.0, 0.0)
+            row += [float(price), float(qty)]
+    return tuple(row)
+
+
+def row_builder(stream):
+    if stream.endswith('@trade'):
+        return trade_row
+    if '@kline_' in stream:
+        return kline_row
+    return depth_row
+
+
+# Appends rows to the column files of one stream, starting a new segment every rotate_rows rows
+class _SegmentWriter:
+    def __init__(self, directory, columns, rotate_rows):
+        self.directory = directory
+        self.columns = columns
+        self.rotate_rows = rotate_rows
+        self.packers = [struct.Struct('<' + code) for _, code in columns]
+        self.files = []
+        self.rows = 0
+        os.makedirs(directory, exist_ok=True)
+
+        existing = list_segments(directory)
+        self.segment = int(os.path.basename(existing[-1])) + 1 if existing else 0
+        self._open_segment()
+
+    def _open_segment(self):
+        path = os.path.join(self.directory, f"{self.segment:06d}")
+        os.makedirs(path, exist_ok=True)
+        self.files = [open(os.path.join(path, f"{name}.bin"), 'ab') for name, _ in self.columns]
+        self.rows = 0
+
+    def _rotate(self):
+        self.close()
+        self.segment += 1
+        self._open_segment()
+
+    def write(self, row):
+        if self.rows >= self.rotate_rows:
+            self._rotate()
+        for f, packer, value in zip(self.files, self.packers, row):
+            f.write(packer.pack(value))
+        self.rows += 1
+
+    # Append whole columns at once (a dict of arrays, one per column), split across
+    # segments so none grows past rotate_rows
+    def write_columns(self, columns):
+        arrays = [np.asarray(columns[name], dtype='<' + code) for name, code in self.columns]
+        count = len(arrays[0])
+        start = 0
+        while start < count:
+            if self.rows >= self.rotate_rows:
+                self._rotate()
+            end = min(count, start + self.rotate_rows - self.rows)
+            for f, values in zip(self.files, arrays):
+                f.write(values[start:end].tobytes())
+            self.rows += end - start
+            start = end
+
+    def flush(self):
+        for f in self.files:
+            f.flush()
+
+    def close(self):
+        for f in self.files:
+            f.close()
+        self.files = []
+
+
+# Records raw trade and kline events to <directory>/<stream>/<segment>/<column>.bin
+class TickRecorder:
+    def __init__(self, directory, rotate_rows=1_000_000):
+        self.directory = directory
+        self.rotate_rows = rotate_rows
+        self.writers = {}
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._subscriptions = []
+
+    def record(self, stream, data):
+        row = row_builder(stream)(data)
+        with self._lock:
+            self._writer(stream).write(row)
+            self.recorded += 1
+
+    # Record a batch of raw trade or kline frames (e.g. a capture made with another tool),
+    # decoded straight into columns
+    def import_frames(self, stream, messages):
+        from decoders import decode_kline_batch, decode_trade_batch
+        columns = decode_trade_batch(messages) if stream.endswith('@trade') else decode_kline_batch(messages)
+        with self._lock:
+            writer = self._writer(stream)
+            writer.write_columns(columns)
+            self.recorded += len(columns['event_time'])
+        return len(columns['event_time'])
+
+    def _writer(self, stream):
+        writer = self.writers.get(stream)
+        if writer is None:
+            writer = _SegmentWriter(os.path.join(self.directory, stream), stream_columns(stream), self.rotate_rows)
+            self.writers[stream] = writer
+        return writer
+
+    # Record every message of the given streams from a MarketDataClient (or ReplayFeed)
+    def attach(self, market_data, streams):
+        for stream in streams:
+            callback = market_data.subscribe(stream, lambda data, stream=stream: self.record(stream, data))
+            self._subscriptions.append((market_data, stream, callback))
+
+    def flush(self):
+        with self._lock:
+            for writer in self.writers.values():
+                writer.flush()
+
+    def close(self):
+        for market_data, stream, callback in self._subscriptions:
+            market_data.unsubscribe(stream, callback)
+        self._subscriptions = []
+        with self._lock:
+            for writer in self.writers.values():
+                writer.close()
+            self.writers = {}
+
+
+def list_segments(stream_directory):
+    if not os.path.isdir(stream_directory):
+        return []
+    return sorted(os.path.join(stream_directory, name) for name in os.listdir(stream_directory) if name.isdigit())
+
+
+def recorded_streams(directory):
+    return sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+
+
+# Memory-map every column of a segment; a partially written last row is ignored
+def load_segment(segment_directory, columns):
+    arrays = {}
+    for name, code in columns:
+        path = os.path.join(segment_directory, f"{name}.bin")
+        dtype = np.dtype('<' + code)
+        if os.path.getsize(path) < dtype.itemsize:
+            arrays[name] = np.zeros(0, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', shape=(os.path.getsize(path) // dtype.itemsize,))
+    rows = min(len(array) for array in arrays.values())
+    return {name: array[:rows] for name, array in arrays.items()}
+
+
+# All segments of a recorded stream concatenated into one array per column
+def load_stream(directory, stream):
+    columns = stream_columns(stream)
+    segments = [load_segment(path, columns) for path in list_segments(os.path.join(directory, stream))]
+    if not segments:
+        return {name: np.zeros(0, dtype='<' + code) for name, code in columns}
+    if len(segments) == 1:
+        return segments[0]
+    return {name: np.concatenate([segment[name] for segment in segments]) for name, _ in columns}
+
+
+def trade_message(symbol, columns, i):
+    return {
+        'e': 'trade', 'E': int(columns['event_time'][i]), 's': symbol, 'T': int(columns['trade_time'][i]),
+        'p': repr(float(columns['price'][i])), 'q': repr(float(columns['qty'][i])), 'm': bool(columns['side'][i] < 0)
+    }
+
+
+def kline_message(symbol, interval, columns, i):
+    return {
+        'e': 'kline', 'E': int(columns['event_time'][i]), 's': symbol,
+        'k': {
+            't': int(columns['open_time'][i]), 'T': int(columns['close_time'][i]), 's': symbol, 'i': interval,
+            'o': repr(float(columns['open'][i])), 'h': repr(float(columns['high'][i])),
+            'l': repr(float(columns['low'][i])), 'c': repr(float(columns['close'][i])),
+            'v': repr(float(columns['volume'][i])), 'x': bool(columns['closed'][i])
+        }
+    }
+
+
+def depth_message(columns, i):
+    message = {'E': int(columns['event_time'][i]), 'bids': [], 'asks': []}
+    for level in range(DEPTH_LEVELS):
+        for side, name in (('bid', 'bids'), ('ask', 'asks')):
+            qty = float(columns[f"{side}_qty_{level}"][i])
+            if qty > 0:
+                message[name].append([repr(float(columns[f"{side}_price_{level}"][i])), repr(qty)])
+    return message
+
+
+# Plays recorded streams back through the same subscribe/start/stop interface as
+# MarketDataClient. speed=1 is real time, speed=N is N times faster and speed=None
+# (or 0) delivers messages as fast as subscribers consume them.
+class ReplayFeed:
+    replaying = True
+
+    def __init__(self, directory, speed=1.0):
+        self.directory = directory
+        self.speed = speed
+        self.running = False
+        self.delivered = 0
+
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def subscribe(self, stream, callback):
+        with self._lock:
+            self._subscribers.setdefault(stream, []).append(callback)
+        return callback
+
+    def unsubscribe(self, stream, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(stream, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def streams(self):
+        with self._lock:
+            return [stream for stream, callbacks in self._subscribers.items() if callbacks]
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._stop_event.set()
+
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    # Merge the subscribed streams by event time and deliver them; blocks until done
+    def run(self):
+        self.running = True
+        builders = []
+        times = []
+        for number, stream in enumerate(self.streams()):
+            columns = load_stream(self.directory, stream)
+            symbol, _, kind = stream.partition('@')
+            symbol = symbol.upper()
+            if kind == 'trade':
+                builders.append((stream, lambda i, c=columns, s=symbol: trade_message(s, c, i)))
+            elif kind.startswith('depth'):
+                builders.append((stream, lambda i, c=columns: depth_message(c, i)))
+            else:
+                interval = kind.partition('_')[2]
+                builders.append((stream, lambda i, c=columns, s=symbol, n=interval: kline_message(s, n, c, i)))
+            times.append(np.stack([columns['event_time'], np.full(len(columns['event_time']), number),
+                                   np.arange(len(columns['event_time']))], axis=1))
+
+        if not times:
+            self.running = False
+            return
+        order = np.concatenate(times)
+        order = order[np.argsort(order[:, 0], kind='stable')]
+
+        start_wall = time.monotonic()
+        first_event = order[0, 0] if len(order) else 0
+        for event_time, number, i in order:
+            if self._stop_event.is_set():
+                break
+            if self.speed:
+                delay = start_wall + (event_time - first_event) / 1000 / self.speed - time.monotonic()
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+            stream, build = builders[number]
+            self._dispatch(stream, build(i))
+            self.delivered += 1
+        self.running = False
+
+    def _dispatch(self, stream, data):
+        with self._lock:
+            callbacks = list(self._subscribers.get(stream, ()))
+        for callback in callbacks:
+            try:
+                callback(data)
+            except Exception as e:
+                print(f"Error in {stream} subscriber: {e}")
@@ -0,0 +1,199 @@
+import csv
+import tkinter as tk
+from datetime import datetime
+from tkinter import filedialog, ttk
+
+import numpy as np
+
+
+SIDES = {'Buy': 1, 'Sell': -1}
+COLUMNS = ("Time", "Price", "Action", "Balance (USD)", "BTC Position")
+
+
+# Every trade of the session: the numbers in growable NumPy columns (33 bytes a trade)
+# and the event's action text, which says how the trade was executed (simulated, paper
+# or live fill), in a list alongside.
+class TradeHistory:
+    def __init__(self, capacity=1024):
+        self.times = np.empty(capacity)  # unix seconds
+        self.prices = np.empty(capacity)
+        self.sides = np.empty(capacity, dtype=np.int8)
+        self.balances = np.empty(capacity)
+        self.positions = np.empty(capacity)
+        self.actions = []
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        capacity = len(self.times) * 2
+        for name in ('times', 'prices', 'sides', 'balances', 'positions'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+    # Add an engine 'trade' event
+    def append(self, event):
+        if self.count == len(self.times):
+            self._grow()
+        i = self.count
+        self.times[i] = event['time'].timestamp()
+        self.prices[i] = event['price']
+        self.sides[i] = SIDES[event['decision']]
+        self.balances[i] = event['balance']
+        self.positions[i] = event['btc_position']
+        self.actions.append(event['action'])
+        self.count += 1
+
+    def extend(self, events):
+        for event in events:
+            self.append(event)
+
+    # TradingLogic.last_trade as it was when the trade was made
+    def action(self, i):
+        return self.actions[i]
+
+    # Display values of one trade, in COLUMNS order
+    def row(self, i):
+        return (datetime.fromtimestamp(self.times[i]).strftime('%H:%M:%S'), f"${self.prices[i]:.2f}", self.action(i),
+                f"${self.balances[i]:.2f}", f"{self.positions[i]:.6f} BTC")
+
+    # Indices of the trades matching a query: 'buy' or 'sell' select a side, anything
+    # else is a case-insensitive substring match on the displayed row
+    def search(self, query):
+        query = query.strip().lower()
+        if not query:
+            return np.arange(self.count)
+        if query in ('buy', 'sell'):
+            return np.flatnonzero(self.sides[:self.count] == SIDES[query.capitalize()])
+        return np.array([i for i in range(self.count) if query in ' '.join(self.row(i)).lower()], dtype=np.int64)
+
+    def export_csv(self, path, indices=None):
+        indices = np.arange(self.count) if indices is None else indices
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['time', 'price', 'side', 'action', 'balance', 'btc_position'])
+            for i in indices:
+                writer.writerow([datetime.fromtimestamp(self.times[i]).astimezone().isoformat(), self.prices[i],
+                                 'Buy' if self.sides[i] > 0 else 'Sell', self.action(i), self.balances[i],
+                                 self.positions[i]])
+
+
+# Treeview over a TradeHistory that never holds more than page_size rows. It follows
+# the latest trades until the user pages back or searches; Latest returns to following.
+class TradeHistoryView:
+    def __init__(self, parent, history=None, page_size=200):
+        self.history = history or TradeHistory()
+        self.page_size = page_size
+        self.page = None  # None follows the latest trades
+        self.matches = None  # indices of the current search, None for all trades
+
+        table_frame = ttk.Frame(parent)
+        table_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+        self.tree = ttk.Treeview(table_frame, columns=COLUMNS, show='headings', height=10, style="Treeview")
+
+        self.tree.heading("Time", text="Time", anchor=tk.CENTER)
+        self.tree.heading("Price", text="Price (USDT)", anchor=tk.CENTER)
+        self.tree.heading("Action", text="Action", anchor=tk.CENTER)
+        self.tree.heading("Balance (USD)", text="Balance (USD)", anchor=tk.CENTER)
+        self.tree.heading("BTC Position", text="BTC Position", anchor=tk.CENTER)
+
+        self.tree.column("Time", width=120, anchor=tk.CENTER)
+        self.tree.column("Price", width=120, anchor=tk.CENTER)
+        self.tree.column("Action", width=150, anchor=tk.CENTER)
+        self.tree.column("Balance (USD)", width=120, anchor=tk.CENTER)
+        self.tree.column("BTC Position", width=120, anchor=tk.CENTER)
+
+        self.tree.tag_configure("green", foreground="green")
+        self.tree.tag_configure("red", foreground="red")
+
+        tree_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=tree_scroll.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        toolbar = ttk.Frame(parent)
+        toolbar.pack(side=tk.TOP, fill=tk.X, pady=5)
+
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(toolbar, textvariable=self.search_var, width=20)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind('<Return>', lambda event: self.search())
+        ttk.Button(toolbar, text="Search", command=self.search).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Clear", command=self.clear_search).pack(side=tk.LEFT, padx=2)
+
+        ttk.Button(toolbar, text="Export CSV", command=self.export).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(toolbar, text="Latest", command=self.follow).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(toolbar, text=">", width=3, command=lambda: self.show_page(self._current_page() + 1)).pack(side=tk.RIGHT)
+        self.page_label = ttk.Label(toolbar, text="", foreground="white")
+        self.page_label.pack(side=tk.RIGHT, padx=5)
+        ttk.Button(toolbar, text="<", width=3, command=lambda: self.show_page(self._current_page() - 1)).pack(side=tk.RIGHT)
+
+        self.update_label()
+
+    def _indices(self):
+        return np.arange(len(self.history)) if self.matches is None else self.matches
+
+    def _page_count(self):
+        return max(1, -(-len(self._indices()) // self.page_size))
+
+    def _current_page(self):
+        return self._page_count() - 1 if self.page is None else self.page
+
+    def _insert(self, i):
+        self.tree.insert('', 'end', values=self.history.row(i), tags=("green" if self.history.sides[i] > 0 else "red",))
+
+    # Record a batch of 'trade' events; only the followed tail is redrawn
+    def add(self, events):
+        first = len(self.history)
+        self.history.extend(events)
+        if self.page is None and self.matches is None:
+            for i in range(max(first, len(self.history) - self.page_size), len(self.history)):
+                self._insert(i)
+            rows = self.tree.get_children()
+            if len(rows) > self.page_size:
+                self.tree.delete(*rows[:len(rows) - self.page_size])
+            self.tree.yview_moveto(1)
+        self.update_label()
+
+    # Show one page of the current trades (or search results)
+    def show_page(self, page):
+        self.page = min(max(page, 0), self._page_count() - 1)
+        indices = self._indices()
+        self._show(indices[self.page * self.page_size:(self.page + 1) * self.page_size])
+        self.tree.yview_moveto(0)
+
+    # Go back to following the latest trades
+    def follow(self):
+        self.page = None
+        self._show(self._indices()[-self.page_size:])
+        self.tree.yview_moveto(1)
+
+    def _show(self, indices):
+        self.tree.delete(*self.tree.get_children())
+        for i in indices:
+            self._insert(i)
+        self.update_label()
+
+    def search(self):
+        query = self.search_var.get()
+        self.matches = self.history.search(query) if query.strip() else None
+        self.show_page(0)
+
+    def clear_search(self):
+        self.search_var.set("")
+        self.matches = None
+        self.follow()
+
+    def export(self):
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if path:
+            self.history.export_csv(path, self.matches)
+
+    def update_label(self):
+        total = len(self._indices())
+        found = f" of {len(self.history)}" if self.matches is not None else ""
+        self.page_label.config(text=f"Page {self._current_page() + 1}/{self._page_count()} ({total}{found} trades)")
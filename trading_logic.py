@@ -1,71 +1,132 @@
-import requests
-import pandas as pd
-import praw
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import nltk
-from dotenv import load_dotenv
+from collections import deque
 import os
+from sentiment import RedditSentimentSource, SentimentEngine
+from indicators import IndicatorSet, SMA
+from strategy import StrategyParams
+from market_context import FearGreedProvider
+from execution import BUY, SELL, Order
 
-# Load environment variables from .env file
-load_dotenv()
 
-# Download VADER lexicon (only needs to be done once)
-nltk.download('vader_lexicon')
+# Load environment variables from .env file. Called by the entry points, not on import.
+def load_environment():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+# The SentimentEngine configured from the environment, or None when sentiment is off.
+# Reddit sentiment can be switched off with REDDIT_SENTIMENT=0; the praw client is only
+# created once the engine first refreshes.
+def make_sentiment_engine(sentiment_source=None, enable_sentiment=None):
+    if enable_sentiment is None:
+        enable_sentiment = os.environ.get('REDDIT_SENTIMENT', '1') == '1'
+    if sentiment_source is None and enable_sentiment:
+        sentiment_source = RedditSentimentSource(None, "Bitcoin", limit=100)
+    if sentiment_source is None:
+        return None
+    return SentimentEngine(
+        sentiment_source,
+        refresh_interval=float(os.environ.get('SENTIMENT_REFRESH_SECONDS', 300)),
+        max_age=float(os.environ.get('SENTIMENT_MAX_AGE_SECONDS', 900)),
+        stale_policy=os.environ.get('SENTIMENT_STALE_POLICY', 'neutral')
+    )
+
 
 class TradingLogic:
-    def __init__(self):
+    def __init__(self, sentiment_source=None, params=None, fear_greed_provider=None, enable_sentiment=None,
+                 executor=None):
+        self.params = params or StrategyParams()
         self.simulated_balance = 10000  # Start with $10,000
         self.btc_position = 0  # No BTC initially
         self.last_trade = "No trade executed."
-        self.price_data = []
-        self.fear_greed_index = None
-        self.fear_greed_classification = None
-        self.commission_fee = 0.001  # 0.1% commission per trade
-
-        # Reddit API Setup using environment variables
-        self.reddit = praw.Reddit(
-            client_id=os.environ.get('CLIENT_ID'),
-            client_secret=os.environ.get('CLIENT_SECRET'),
-            user_agent=os.environ.get('USER_AGENT', 'SentimentCollector')
+        self.price_data = deque(maxlen=max(100, self.params.long_window))  # Keep only the last 100 prices (or the long SMA window)
+        self.indicators = self._build_indicators()
+        self.commission_fee = self.params.commission_fee
+
+        # Without an executor trades fill instantly at the last price (as in the backtester).
+        # With one, orders are submitted without blocking and their fills are applied to the
+        # balance by apply_fills() on the thread that runs the strategy.
+        self.executor = executor
+        self.pending_order = None
+        self._execution_events = deque()  # ('fill', Fill) / ('done', Order), appended by the executor
+
+        # Sentiment is refreshed in the background and read without blocking the tick path
+        self.sentiment_engine = make_sentiment_engine(sentiment_source, enable_sentiment)
+
+        # Fear and Greed Index, refreshed in the background on the API's update cadence
+        self.fear_greed_provider = fear_greed_provider or FearGreedProvider(
+            cache_path=os.environ.get('FEAR_GREED_CACHE', 'fear_greed_cache.json')
         )
 
-    # Method to fetch Fear and Greed Index from external API
+    # Latest cached Fear and Greed reading, never blocks
+    @property
+    def fear_greed_index(self):
+        return self.fear_greed_provider.index
+
+    @property
+    def fear_greed_classification(self):
+        return self.fear_greed_provider.classification
+
+    # Fetch the Fear and Greed Index from the external API right away (blocking)
     def fetch_fear_greed_index(self):
         try:
-            url = 'https://api.alternative.me/fng/?limit=1'
-            response = requests.get(url)
-            data = response.json()
-            if 'data' in data:
-                self.fear_greed_index = int(data['data'][0]['value'])
-                self.fear_greed_classification = data['data'][0]['value_classification']
+            self.fear_greed_provider.refresh()
         except Exception as e:
             print(f"Error fetching Fear and Greed Index: {e}")
-            self.fear_greed_index, self.fear_greed_classification = None, None
 
-    # Fetch Reddit sentiment
-    def fetch_and_analyze_reddit(self, subreddit_name="Bitcoin", limit=30):
-        subreddit = self.reddit.subreddit(subreddit_name)
-        posts = subreddit.hot(limit=limit)
+    # Start and stop the background Fear and Greed refresh
+    def start_market_context(self):
+        self.fear_greed_provider.start()
+
+    def stop_market_context(self):
+        self.fear_greed_provider.stop()
+
+    # Start and stop the background sentiment refresh
+    def start_sentiment(self):
+        if self.sentiment_engine:
+            self.sentiment_engine.start()
 
-        sia = SentimentIntensityAnalyzer()
-        total_sentiment = 0
-        post_count = 0
+    def stop_sentiment(self):
+        if self.sentiment_engine:
+            self.sentiment_engine.stop()
 
-        for post in posts:
-            title = post.title
-            sentiment = sia.polarity_scores(title)
-            total_sentiment += sentiment['compound']
-            post_count += 1
+    # The periodic context refreshes as callables returning the delay until their next run,
+    # for runtimes that schedule them on their own loop instead of starting threads
+    def context_refreshers(self):
+        refreshers = [self.fear_greed_provider.run_once]
+        if self.sentiment_engine:
+            refreshers.append(self.sentiment_engine.run_once)
+        return refreshers
+
+    def _build_indicators(self):
+        return IndicatorSet({
+            'SMA_short': SMA(self.params.short_window),
+            'SMA_long': SMA(self.params.long_window)
+        })
+
+    # Portfolio and price window as plain values, for persisting
+    def snapshot(self):
+        return {
+            'balance': self.simulated_balance,
+            'btc_position': self.btc_position,
+            'last_trade': self.last_trade,
+            'price_data': list(self.price_data)
+        }
 
-        # Calculate average sentiment
-        average_sentiment = total_sentiment / post_count if post_count > 0 else 0
-        return average_sentiment
+    # Restore a snapshot and rebuild the indicators from its price window, so the
+    # strategy can decide on the next tick instead of waiting for the window to refill
+    def restore(self, snapshot):
+        self.simulated_balance = snapshot['balance']
+        self.btc_position = snapshot['btc_position']
+        self.last_trade = snapshot['last_trade']
+        self.price_data.clear()
+        self.indicators = self._build_indicators()
+        for price in snapshot.get('price_data', ()):
+            self.update_price_data(price)
 
-    # Update price data
+    # Update price data and every indicator in constant time
     def update_price_data(self, price):
         self.price_data.append(price)
-        if len(self.price_data) > 100:  # Keep only the last 100 prices
-            self.price_data.pop(0)
+        self.indicators.update(price)
 
     # Apply trading logic based on Fear & Greed Index, SMA, and Reddit Sentiment
     def apply_trading_logic(self):
@@ -77,16 +138,13 @@ class TradingLogic:
         fear_greed_score = 0
         sentiment_score = 0
 
-        if len(self.price_data) >= 50:
-            df = pd.DataFrame(self.price_data, columns=['close'])
-            df['SMA20'] = df['close'].rolling(window=20).mean()
-            df['SMA50'] = df['close'].rolling(window=50).mean()
-
-            # Fetch Reddit sentiment
-            reddit_sentiment = self.fetch_and_analyze_reddit("Bitcoin", limit=100)
+        params = self.params
+        if self.indicators.ready('SMA_short', 'SMA_long'):
+            # Latest Reddit sentiment published by the background engine
+            reddit_sentiment = self.sentiment_engine.get_sentiment() if self.sentiment_engine else 0
 
             # Calculate SMA points
-            sma_diff = df['SMA20'].iloc[-1] - df['SMA50'].iloc[-1]
+            sma_diff = self.indicators['SMA_short'] - self.indicators['SMA_long']
             if sma_diff > 0:
                 sma_score = sma_diff
                 buy_score += sma_diff  # Positive difference adds to buy score
@@ -97,42 +155,55 @@ class TradingLogic:
             # Calculate Fear & Greed points
             if self.fear_greed_index is not None:
                 fg_value = int(self.fear_greed_index)
-                if fg_value <= 20:  # Extreme Fear, strong buy signal
+                if fg_value <= params.extreme_fear:  # Extreme Fear, strong buy signal
                     fear_greed_score = 5
                     buy_score += 5
-                elif fg_value <= 50:  # Fear or Neutral, moderate buy signal
+                elif fg_value <= params.fear:  # Fear or Neutral, moderate buy signal
                     fear_greed_score = 2
                     buy_score += 2
-                elif fg_value >= 80:  # Extreme Greed, strong sell signal
+                elif fg_value >= params.extreme_greed:  # Extreme Greed, strong sell signal
                     fear_greed_score = 5
                     sell_score += 5
-                elif fg_value >= 60:  # Greed, moderate sell signal
+                elif fg_value >= params.greed:  # Greed, moderate sell signal
                     fear_greed_score = 2
                     sell_score += 2
 
             # Calculate Sentiment points
-            if reddit_sentiment > 0.5:  # Strong positive sentiment
+            if reddit_sentiment > params.strong_sentiment:  # Strong positive sentiment
                 sentiment_score = 3
                 buy_score += 3
-            elif reddit_sentiment > 0.2:  # Moderately positive sentiment
+            elif reddit_sentiment > params.moderate_sentiment:  # Moderately positive sentiment
                 sentiment_score = 1
                 buy_score += 1
-            elif reddit_sentiment < -0.5:  # Strong negative sentiment
+            elif reddit_sentiment < -params.strong_sentiment:  # Strong negative sentiment
                 sentiment_score = 3
                 sell_score += 3
-            elif reddit_sentiment < -0.2:  # Moderately negative sentiment
+            elif reddit_sentiment < -params.moderate_sentiment:  # Moderately negative sentiment
                 sentiment_score = 1
                 sell_score += 1
 
-            # **Threshold Logic**: Buy if buy_score ≥ 5, Sell if sell_score ≥ 5
-            if buy_score >= 3.5 and self.btc_position == 0 and self.simulated_balance > 0:
+            # **Threshold Logic**: Buy if buy_score ≥ threshold, Sell if sell_score ≥ threshold
+            if self.pending_order is not None:
+                reason = f"Hold: Waiting for {self.pending_order.side.lower()} order {self.pending_order.id} to fill"
+                return "Hold", reason, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score
+
+            if buy_score >= params.score_threshold and self.btc_position == 0 and self.simulated_balance > 0:
+                if self.executor is not None:
+                    # Sized from the tracked balance, also with live orders, not from the account balance
+                    self._submit(Order(BUY, quote_quantity=self.simulated_balance))
+                    reason = f"Buy order submitted with a score of {buy_score}."
+                    return "Buy", reason, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score
                 # Simulate buy
                 self.btc_position = (self.simulated_balance * (1 - self.commission_fee)) / self.price_data[-1]
                 self.simulated_balance = 0
                 self.last_trade = f"Simulated Buy: {self.btc_position:.6f} BTC at ${self.price_data[-1]:.2f}"
                 reason = f"Buy executed with a score of {buy_score}. Reason: Positive sentiment, favorable SMA, and Fear & Greed index."
                 return "Buy", reason, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score
-            elif sell_score >= 3.5 and self.btc_position > 0:
+            elif sell_score >= params.score_threshold and self.btc_position > 0:
+                if self.executor is not None:
+                    self._submit(Order(SELL, quantity=self.btc_position))
+                    reason = f"Sell order submitted with a score of {sell_score}."
+                    return "Sell", reason, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score
                 # Simulate sell
                 self.simulated_balance = self.btc_position * self.price_data[-1] * (1 - self.commission_fee)
                 self.btc_position = 0
@@ -147,6 +218,49 @@ class TradingLogic:
                     reason = f"Hold: Insufficient sell score ({sell_score})"
                 return "Hold", reason, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score
 
+        # Not enough prices for the long SMA yet
+        reason = "Hold: Collecting price data"
+        return "Hold", reason, sma_score, fear_greed_score, sentiment_score, buy_score, sell_score
+
+    def _submit(self, order):
+        self.pending_order = order
+        self.last_trade = f"{order.side.capitalize()} order {order.id} submitted at ~${self.price_data[-1]:.2f}"
+        self.executor.submit(order, on_fill=lambda fill: self._execution_events.append(('fill', fill)),
+                             on_done=lambda done: self._execution_events.append(('done', done)))
+
+    # Apply the fills reported since the last call to the balance and position.
+    # Returns those fills and the orders that finished.
+    def apply_fills(self):
+        fills = []
+        finished = []
+        while self._execution_events:
+            kind, item = self._execution_events.popleft()
+            if kind == 'done':
+                finished.append(item)
+                if self.pending_order is item:
+                    self.pending_order = None
+                if item.filled:
+                    self.last_trade = (f"{item.side.capitalize()} {item.status.lower()}: {item.filled:.6f} BTC "
+                                       f"at avg ${item.average_price:.2f}")
+                else:
+                    self.last_trade = f"{item.side.capitalize()} order {item.id} {item.status.lower()}"
+                continue
+
+            if item.side == BUY:
+                self.simulated_balance -= item.quote
+                self.btc_position += item.quantity - (item.fee if item.fee_asset == 'BASE' else 0)
+            else:
+                self.btc_position -= item.quantity
+                self.simulated_balance += item.quote - (item.fee if item.fee_asset == 'QUOTE' else 0)
+            # Dust left by rounding shouldn't keep the position or balance "open"; that includes
+            # a position below the exchange's minimum lot, which can't be sold anyway
+            if abs(self.btc_position) < max(1e-12, self.executor.min_quantity()):
+                self.btc_position = 0
+            if abs(self.simulated_balance) < 1e-9:
+                self.simulated_balance = 0
+            fills.append(item)
+        return fills, finished
+
     # Get the state of the current balance, position, and last trade
     def get_state(self):
         return {